@@ -31,12 +31,18 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
+    'django_filters',
     'vehicles',
 ]
 
 MIDDLEWARE = [
+    # Primero, para medir también el resto de middlewares
+    'vehicles.metrics.MetricsMiddleware',
+    # Antes que el resto: comprime la respuesta ya terminada
+    'vehicles.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -88,6 +94,39 @@ else:
         }
     }
 
+# Caché local por proceso por defecto; con REDIS_URL se comparte entre workers
+if 'REDIS_URL' in os.environ:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'car-moto-sales',
+        }
+    }
+
+# Límite de escrituras anónimas (contacto, suscripción) en vehicles/throttling.py.
+# Con Redis las cubetas se comparten entre procesos; si no, cada proceso tiene las suyas.
+THROTTLE_BACKEND = (
+    'vehicles.throttling.CacheBucketBackend' if os.environ.get('REDIS_URL')
+    else 'vehicles.throttling.LocalBucketBackend'
+)
+THROTTLE_CACHE_ALIAS = 'default'
+# Claves que guarda LocalBucketBackend (unos 200 bytes cada una)
+THROTTLE_LOCAL_MAX_KEYS = int(os.environ.get('THROTTLE_LOCAL_MAX_KEYS', 50_000))
+
+# Caché de respuestas del catálogo público (vehicles/cache.py). Con LocMem cada
+# proceso tiene la suya y no ve lo que escriben el worker de imágenes y los
+# comandos, así que las respuestas vencen a los CATALOGUE_LOCAL_CACHE_TIMEOUT.
+CATALOGUE_CACHE_ALIAS = 'default'
+CATALOGUE_CACHE_TIMEOUT = int(os.environ.get('CATALOGUE_CACHE_TIMEOUT', 300))
+CATALOGUE_LOCAL_CACHE_TIMEOUT = int(os.environ.get('CATALOGUE_LOCAL_CACHE_TIMEOUT', 30))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -113,22 +152,61 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Las subidas se guardan con un hash del contenido en el nombre
+DEFAULT_FILE_STORAGE = 'vehicles.storage.HashedFileSystemStorage'
+
+# Entrega de /media/: '' la hace Django en streaming; 'x-sendfile' (Apache,
+# lighttpd) o 'x-accel-redirect' (nginx) delegan la lectura al servidor web.
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE', '')
+# Location "internal" de nginx que apunta a MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+# Caché de los archivos sin hash en el nombre (subidos antes del cambio)
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 3600))
+
+# /api/metrics/ (Prometheus): con METRICS_TOKEN se pide "Authorization: Bearer
+# <token>"; sin él, un usuario autenticado. Las métricas son de cada proceso.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Respuestas más chicas que esto (bytes) no se comprimen
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+# Peticiones más lentas que esto (ms) se registran con su SQL; 0 lo desactiva
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 0))
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'vehicles.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'vehicles.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Proxies delante de la app que agregan X-Forwarded-For (p. ej. 1 en Railway).
+    # Con 0 la IP del cliente es REMOTE_ADDR; nunca se confía en todo el encabezado.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    # Cubetas de fichas: "n/período" admite ráfagas de n y se recarga en el período
+    'DEFAULT_THROTTLE_RATES': {
+        'contact_ip': '5/min',
+        'contact_email': '3/hour',
+        'subscribe_ip': '10/min',
+        'subscribe_email': '5/hour',
+    },
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    # El access token lleva username e is_staff: las peticiones autenticadas
+    # no leen el usuario de la base (vehicles/authentication.py)
+    'TOKEN_OBTAIN_SERIALIZER': 'vehicles.authentication.ClaimsTokenObtainPairSerializer',
+    'TOKEN_USER_CLASS': 'vehicles.authentication.ClaimsUser',
 }
+# Usuarios completos (p. ej. para created_by) en memoria de cada proceso
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 256))
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:4200",
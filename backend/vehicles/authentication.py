@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+# Datos del usuario que viajan firmados en el token (además del id)
+USER_CLAIMS = ('username', 'is_staff')
+
+
+def add_user_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    # El refresh lleva los claims y los copia a cada access que genera
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+
+class UserCache:
+    """
+    LRU de usuarios por proceso con vencimiento. Las escrituras sobre un
+    usuario lo descartan en este proceso (ver signals.py); en los demás se
+    renueva al vencer el TTL.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._users.move_to_end(user_id)
+                return entry[0]
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is not None:
+            with self._lock:
+                self._users[user_id] = (user, now + self.ttl)
+                self._users.move_to_end(user_id)
+                while len(self._users) > self.max_size:
+                    self._users.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+
+
+class ClaimsUser(TokenUser):
+    """
+    Usuario armado con los claims del token, sin consultar la base. Cuando
+    hace falta el registro completo (p. ej. para created_by) se usa
+    ``model_user()``, que pasa por el LRU.
+    """
+
+    @cached_property
+    def user(self):
+        user = user_cache.get(self.id)
+        if user is None or not user.is_active:
+            raise AuthenticationFailed('Usuario no encontrado o inactivo', code='user_not_found')
+        return user
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Confía en los claims firmados del access token (id, username, is_staff)
+    en lugar de leer el usuario en cada petición. Desactivar un usuario o
+    cambiar su contraseña no invalida los tokens ya emitidos hasta que
+    vencen (ACCESS_TOKEN_LIFETIME). Los tokens emitidos antes de agregar
+    los claims siguen funcionando con el usuario del LRU.
+    """
+
+    def get_user(self, validated_token):
+        if all(claim in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+        user = user_cache.get(validated_token.get(api_settings.USER_ID_CLAIM))
+        if user is None or not user.is_active:
+            raise AuthenticationFailed('Usuario no encontrado o inactivo', code='user_not_found')
+        return user
+
+
+def model_user(user):
+    """El User de la base para un request.user, venga o no de los claims."""
+    return user.user if isinstance(user, ClaimsUser) else user
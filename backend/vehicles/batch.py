@@ -0,0 +1,176 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import exceptions, serializers, status
+
+from .cache import bump_generation
+from .models import Car, Motorcycle, FeaturedItem, Discount
+from .serializers import CarSerializer, MotorcycleSerializer, FeaturedItemSerializer, DiscountSerializer
+from .signals import CACHE_NAMESPACES
+from .snapshots import SNAPSHOT_MODELS, SNAPSHOT_SOURCE_FIELDS, sync_snapshots
+from .stats import invalidate_dashboard_stats
+
+# Recurso de la URL -> (modelo, serializer que valida los cambios)
+BATCH_RESOURCES = {
+    'cars': (Car, CarSerializer),
+    'motorcycles': (Motorcycle, MotorcycleSerializer),
+    'featured': (FeaturedItem, FeaturedItemSerializer),
+    'discounts': (Discount, DiscountSerializer),
+}
+
+# No se cambian en lote: la imagen necesita su archivo y el vehículo de un
+# destacado/descuento define los datos copiados en él.
+BATCH_READ_ONLY_FIELDS = {'id', 'image', 'car', 'motorcycle', 'vehicle_type', 'created_by'}
+# Las copias del vehículo en destacados y descuentos: sync_snapshots las
+# reescribiría con los datos del vehículo.
+SNAPSHOT_FIELDS = {
+    model: {'title', price_field, 'image_url'} for model, (price_field, _, _) in SNAPSHOT_MODELS.items()
+}
+
+VEHICLE_FIELDS = {Car: 'car', Motorcycle: 'motorcycle'}
+
+
+def _after_write(*models):
+    # update(), bulk_update() y bulk_create() no disparan las señales
+    for model in models:
+        bump_generation(CACHE_NAMESPACES[model])
+    if any(model in VEHICLE_FIELDS for model in models):
+        invalidate_dashboard_stats()
+
+
+class BatchConflict(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Otra petición creó elementos para los mismos vehículos al mismo tiempo; reintente.'
+    default_code = 'conflict'
+
+
+def _read_only_errors(model, changes):
+    read_only = BATCH_READ_ONLY_FIELDS | SNAPSHOT_FIELDS.get(model, set())
+    fields = sorted(read_only.intersection(changes))
+    return {field: ['No se puede modificar en lote.'] for field in fields}
+
+
+def batch_update(model, serializer_class, ids, changes):
+    """Aplica los mismos cambios a todos los ids con un único UPDATE."""
+    errors = _read_only_errors(model, changes)
+    if errors:
+        raise serializers.ValidationError({'changes': errors})
+    serializer = serializer_class(data=changes, partial=True)
+    if not serializer.is_valid():
+        raise serializers.ValidationError({'changes': serializer.errors})
+    if not serializer.validated_data:
+        raise serializers.ValidationError({'changes': 'Ningún campo modificable.'})
+
+    with transaction.atomic():
+        queryset = model.objects.filter(pk__in=ids)
+        existing = set(queryset.select_for_update().values_list('pk', flat=True))
+        updated = queryset.update(**serializer.validated_data, updated_at=timezone.now())
+        if model in VEHICLE_FIELDS and SNAPSHOT_SOURCE_FIELDS.intersection(serializer.validated_data):
+            sync_snapshots(model, ids)
+    if updated:
+        _after_write(model)
+
+    results = [
+        {'id': pk, 'status': 'updated' if pk in existing else 'not_found'}
+        for pk in dict.fromkeys(ids)
+    ]
+    return {'updated': updated, 'results': results}
+
+
+def batch_update_items(model, serializer_class, items):
+    """Cambios distintos por elemento; se validan uno a uno y se guardan con bulk_update."""
+    results, changed, fields = [], [], set()
+    with transaction.atomic():
+        instances = model.objects.select_for_update().in_bulk([item['id'] for item in items])
+        for item in items:
+            pk = item['id']
+            changes = {key: value for key, value in item.items() if key != 'id'}
+            instance = instances.get(pk)
+            if instance is None:
+                results.append({'id': pk, 'status': 'not_found'})
+                continue
+            errors = _read_only_errors(model, changes)
+            serializer = serializer_class(instance, data=changes, partial=True)
+            if errors or not serializer.is_valid():
+                results.append({'id': pk, 'status': 'invalid', 'errors': errors or serializer.errors})
+                continue
+            for field, value in serializer.validated_data.items():
+                setattr(instance, field, value)
+            fields.update(serializer.validated_data)
+            changed.append(instance)
+            results.append({'id': pk, 'status': 'updated'})
+
+        if changed and fields:
+            now = timezone.now()
+            for instance in changed:
+                instance.updated_at = now
+            model.objects.bulk_update(changed, sorted(fields | {'updated_at'}))
+            if model in VEHICLE_FIELDS and SNAPSHOT_SOURCE_FIELDS.intersection(fields):
+                sync_snapshots(model, [instance.pk for instance in changed])
+    if changed and fields:
+        _after_write(model)
+    return {'updated': len(changed) if fields else 0, 'results': results}
+
+
+def batch_delete(model, ids):
+    with transaction.atomic():
+        queryset = model.objects.filter(pk__in=ids)
+        existing = set(queryset.values_list('pk', flat=True))
+        # delete() de un queryset sigue enviando post_delete por objeto (también
+        # en los borrados en cascada), así que las cachés se invalidan solas.
+        queryset.delete()
+    results = [
+        {'id': pk, 'status': 'deleted' if pk in existing else 'not_found'}
+        for pk in dict.fromkeys(ids)
+    ]
+    return {'deleted': len(existing), 'results': results}
+
+
+def _batch_create(model, user, vehicle_ids, taken, **values):
+    """
+    Crea un destacado o descuento por vehículo con bulk_create. Los
+    vehículos inexistentes o que ya están en el queryset ``taken`` se
+    informan y se saltan. Las filas de los vehículos quedan bloqueadas
+    hasta el final de la transacción, así que otro lote sobre los mismos
+    vehículos espera y luego los ve en ``taken`` (Discount no tiene índice
+    único que lo impida). Si igual choca con el índice único de
+    FeaturedItem, por ejemplo con un alta individual, no se crea ninguno (409).
+    """
+    results, pending = [], []
+    try:
+        with transaction.atomic():
+            for vehicle_model, field in VEHICLE_FIELDS.items():
+                ids = list(dict.fromkeys(vehicle_ids[field]))
+                # En orden de pk para que dos lotes no se bloqueen mutuamente
+                vehicles = vehicle_model.objects.select_for_update().order_by('pk').in_bulk(ids)
+                taken_ids = set(
+                    taken.filter(**{f'{field}_id__in': ids}).values_list(f'{field}_id', flat=True)
+                )
+                for pk in ids:
+                    if pk not in vehicles:
+                        results.append({'id': pk, 'vehicle_type': field, 'status': 'not_found'})
+                    elif pk in taken_ids:
+                        results.append({'id': pk, 'vehicle_type': field, 'status': 'exists'})
+                    else:
+                        obj = model(**{field: vehicles[pk]}, vehicle_type=field, created_by=user, **values)
+                        obj.fill_vehicle_fields()
+                        result = {'id': pk, 'vehicle_type': field, 'status': 'created'}
+                        results.append(result)
+                        pending.append((result, obj))
+            created = model.objects.bulk_create([obj for _, obj in pending])
+    except IntegrityError:
+        raise BatchConflict()
+
+    for (result, _), obj in zip(pending, created):
+        result['created_id'] = obj.pk
+    if created:
+        _after_write(model)
+    return {'created': len(created), 'results': results}
+
+
+def batch_create_featured(user, cars, motorcycles):
+    return _batch_create(FeaturedItem, user, {'car': cars, 'motorcycle': motorcycles}, FeaturedItem.objects.all())
+
+
+def batch_create_discounts(user, cars, motorcycles, **values):
+    # Como en available-*-discount/, solo impide crear otro un descuento activo sin vencer
+    return _batch_create(Discount, user, {'car': cars, 'motorcycle': motorcycles}, Discount.objects.live(), **values)
@@ -0,0 +1,412 @@
+import io
+import json
+import math
+import random
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .cache import bump_generation
+from .discounts import with_effective_price
+from .models import Car, Motorcycle, FeaturedItem, Discount, Subscriber
+from .projections import (
+    CarValuesSerializer,
+    MotorcycleValuesSerializer,
+    FeaturedItemValuesSerializer,
+    DiscountValuesSerializer,
+)
+from .renderers import FastJSONRenderer
+from .signals import CACHE_NAMESPACES
+from .stats import invalidate_dashboard_stats
+
+# Todo lo que genera seed() pertenece a este usuario (o usa este dominio de
+# email), así clear() lo borra sin tocar el resto de los datos.
+BENCHMARK_USERNAME = 'benchmark'
+SUBSCRIBER_DOMAIN = 'benchmark.invalid'
+
+BRANDS = {
+    Car: ['Toyota', 'Ford', 'Chevrolet', 'Volkswagen', 'Renault', 'Peugeot', 'Fiat', 'Honda', 'BMW', 'Audi'],
+    Motorcycle: ['Yamaha', 'Honda', 'Suzuki', 'Kawasaki', 'Ducati', 'BMW', 'KTM', 'Bajaj'],
+}
+MODELS = ['Sport', 'Classic', 'Urban', 'Trail', 'GT', 'Plus', 'Max', 'Lite']
+COLORS = ['Rojo', 'Azul', 'Negro', 'Blanco', 'Gris', 'Verde']
+FUEL_TYPES = ['Gasolina', 'Diésel', 'Eléctrico', 'Híbrido']
+
+SEED_BATCH_SIZE = 1000
+
+
+def _vehicle(model, rng, user, now):
+    brand = rng.choice(BRANDS[model])
+    name = rng.choice(MODELS)
+    year = rng.randint(2005, now.year)
+    fields = {
+        'title': f'{brand} {name} {year}',
+        'description': f'{brand} {name} en muy buen estado, service al día.',
+        'price': Decimal(rng.randint(300_000, 6_000_000)) / 100,
+        'brand': brand,
+        'model': name,
+        'year': year,
+        'color': rng.choice(COLORS),
+        'mileage': rng.randint(0, 250_000),
+        'fuel_type': rng.choice(FUEL_TYPES),
+        'created_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+        'is_sold': rng.random() < 0.1,
+        'created_by': user,
+    }
+    if model is Car:
+        fields.update(
+            engine=f'{rng.choice([1.0, 1.4, 1.6, 2.0, 3.0])}',
+            transmission=rng.choice(Car.TRANSMISSION_CHOICES)[0],
+            image='cars/benchmark.jpg',
+        )
+    else:
+        fields.update(
+            engine=f'{rng.choice([110, 150, 250, 650, 1000])}cc',
+            category=rng.choice(Motorcycle.CATEGORY_CHOICES)[0],
+            image='motorcycles/benchmark.jpg',
+        )
+    return model(**fields)
+
+
+def seed(cars=1000, motorcycles=1000, discounts=200, featured=50, subscribers=1000,
+         password=BENCHMARK_USERNAME, random_seed=0):
+    """
+    Genera datos de prueba reproducibles (misma semilla, mismos datos) con
+    bulk_create. Devuelve cuántas filas se crearon de cada modelo.
+    """
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+    user.set_password(password)
+    user.save()
+
+    created = {}
+    with transaction.atomic():
+        vehicles = {}
+        for model, count in ((Car, cars), (Motorcycle, motorcycles)):
+            instances = [_vehicle(model, rng, user, now) for _ in range(count)]
+            vehicles[model] = model.objects.bulk_create(instances, batch_size=SEED_BATCH_SIZE)
+            created[model] = len(instances)
+
+        # Un destacado y como mucho un descuento vigente por vehículo
+        candidates = [
+            (field, vehicle)
+            for model, field in ((Car, 'car'), (Motorcycle, 'motorcycle'))
+            for vehicle in vehicles[model]
+        ]
+        discounted = rng.sample(candidates, min(discounts, len(candidates)))
+        objects = []
+        for field, vehicle in discounted:
+            start = now + timedelta(days=rng.randint(-30, 5))
+            discount = Discount(
+                **{field: vehicle}, vehicle_type=field, created_by=user,
+                discount_percentage=Decimal(rng.randint(500, 4000)) / 100,
+                start_date=start, end_date=start + timedelta(days=rng.randint(1, 60)),
+            )
+            discount.fill_vehicle_fields()
+            objects.append(discount)
+        created[Discount] = len(Discount.objects.bulk_create(objects, batch_size=SEED_BATCH_SIZE))
+
+        objects = []
+        for field, vehicle in rng.sample(candidates, min(featured, len(candidates))):
+            item = FeaturedItem(**{field: vehicle}, vehicle_type=field, created_by=user)
+            item.fill_vehicle_fields()
+            objects.append(item)
+        created[FeaturedItem] = len(FeaturedItem.objects.bulk_create(objects, batch_size=SEED_BATCH_SIZE))
+
+        start = Subscriber.objects.filter(email__endswith=f'@{SUBSCRIBER_DOMAIN}').count()
+        objects = [
+            Subscriber(email=f'user{number}@{SUBSCRIBER_DOMAIN}')
+            for number in range(start, start + subscribers)
+        ]
+        created[Subscriber] = len(Subscriber.objects.bulk_create(objects, batch_size=SEED_BATCH_SIZE))
+
+    # bulk_create no dispara post_save
+    for model in (Car, Motorcycle, Discount, FeaturedItem):
+        bump_generation(CACHE_NAMESPACES[model])
+    invalidate_dashboard_stats()
+    return created
+
+
+def clear():
+    """
+    Borra los datos de seed() y lo creado por el escenario "create" (las
+    imágenes que subió quedan en MEDIA_ROOT).
+    """
+    # En cascada: vehículos, destacados, descuentos y trabajos de imágenes
+    deleted, _ = User.objects.filter(username=BENCHMARK_USERNAME).delete()
+    subscribers, _ = Subscriber.objects.filter(email__endswith=f'@{SUBSCRIBER_DOMAIN}').delete()
+    return deleted + subscribers
+
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), (200, 30, 30)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class Scenario:
+    """
+    Una petición representativa. ``build(context, rng)`` devuelve
+    (método, ruta, datos); los datos se envían como multipart.
+    """
+
+    def __init__(self, name, build, auth=False):
+        self.name = name
+        self.build = build
+        self.auth = auth
+
+
+def _new_car(context, rng):
+    brand = rng.choice(BRANDS[Car])
+    return 'POST', '/api/cars/', {
+        'title': f'{brand} Benchmark', 'description': 'Alta del benchmark', 'price': '15000.00',
+        'brand': brand, 'model': 'Benchmark', 'year': 2020, 'color': 'Rojo', 'engine': '1.6',
+        'transmission': 'manual', 'mileage': 1000, 'fuel_type': 'Gasolina',
+        'image': ('benchmark.png', context['image'], 'image/png'),
+    }
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in [
+        Scenario('list', lambda context, rng: ('GET', '/api/cars/?page_size=20', None)),
+        Scenario('list-filtered', lambda context, rng: (
+            'GET', f'/api/cars/?page_size=20&brand={rng.choice(BRANDS[Car])}&ordering=effective_price', None,
+        )),
+        Scenario('feed', lambda context, rng: ('GET', '/api/vehicles/?page_size=20', None)),
+        Scenario('search', lambda context, rng: (
+            'GET', f'/api/search/?q={rng.choice(BRANDS[Car])}+{rng.choice(MODELS)}', None,
+        )),
+        Scenario('detail', lambda context, rng: ('GET', f'/api/cars/{rng.choice(context["car_ids"])}/', None)),
+        Scenario('create', _new_car, auth=True),
+        Scenario('export', lambda context, rng: ('GET', '/api/export/cars.csv', None), auth=True),
+    ]
+}
+
+
+def scenario_context():
+    # Ids reales para "detail"; se leen una vez, antes de medir
+    car_ids = list(Car.objects.values_list('pk', flat=True)[:5000])
+    return {'car_ids': car_ids or [0], 'image': _png()}
+
+
+class ClientRunner:
+    """Ejecuta en el proceso con APIClient; cuenta las consultas SQL."""
+
+    counts_queries = True
+
+    def __init__(self):
+        # Fuera de los tests "testserver" no está en ALLOWED_HOSTS
+        self.anonymous = APIClient(SERVER_NAME='localhost')
+        self.authenticated = APIClient(SERVER_NAME='localhost')
+        user = User.objects.filter(username=BENCHMARK_USERNAME).first()
+        if user is not None:
+            self.authenticated.force_authenticate(user)
+
+    def request(self, scenario, method, path, data):
+        client = self.authenticated if scenario.auth else self.anonymous
+        if data is not None:
+            data = {
+                key: _upload(value) if isinstance(value, tuple) else value
+                for key, value in data.items()
+            }
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = client.generic(method, path) if data is None else client.post(path, data)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - start
+        return elapsed, response.status_code, len(queries)
+
+
+def _upload(value):
+    name, content, content_type = value
+    return SimpleUploadedFile(name, content, content_type=content_type)
+
+
+class HttpRunner:
+    """Contra un servidor en marcha (runserver, gunicorn); admite concurrencia."""
+
+    counts_queries = False
+
+    def __init__(self, base_url, username=BENCHMARK_USERNAME, password=BENCHMARK_USERNAME):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self._token = None
+
+    def token(self):
+        if self._token is None:
+            body = json.dumps({'username': self.username, 'password': self.password}).encode()
+            request = urllib.request.Request(
+                f'{self.base_url}/api/token/', body, {'Content-Type': 'application/json'},
+            )
+            with urllib.request.urlopen(request) as response:
+                self._token = json.load(response)['access']
+        return self._token
+
+    def request(self, scenario, method, path, data):
+        headers = {}
+        if scenario.auth:
+            headers['Authorization'] = f'Bearer {self.token()}'
+        body = None
+        if data is not None:
+            body, headers['Content-Type'] = _multipart(data)
+        request = urllib.request.Request(f'{self.base_url}{path}', body, headers, method=method)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                while response.read(65536):
+                    pass
+                status = response.status
+        except urllib.error.HTTPError as error:
+            status = error.code
+        return time.perf_counter() - start, status, None
+
+
+def _multipart(data):
+    boundary = 'benchmark-boundary'
+    parts = []
+    for key, value in data.items():
+        if isinstance(value, tuple):
+            name, content, content_type = value
+            header = (
+                f'Content-Disposition: form-data; name="{key}"; filename="{name}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n'
+            )
+        else:
+            header, content = f'Content-Disposition: form-data; name="{key}"\r\n\r\n', str(value).encode()
+        parts.append(f'--{boundary}\r\n{header}'.encode() + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def percentile(values, fraction):
+    # Método del rango más cercano, sobre valores ordenados
+    if not values:
+        return None
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def run_scenario(runner, scenario, context, requests=100, warmup=5, concurrency=1, random_seed=0):
+    """Ejecuta ``requests`` peticiones (más ``warmup`` sin medir) y resume los tiempos."""
+    rng = random.Random(random_seed)
+    calls = [scenario.build(context, rng) for _ in range(warmup + requests)]
+
+    def send(call):
+        return runner.request(scenario, *call)
+
+    for call in calls[:warmup]:
+        send(call)
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(send, calls[warmup:]))
+    else:
+        results = [send(call) for call in calls[warmup:]]
+    total = time.perf_counter() - start
+
+    latencies = sorted(elapsed for elapsed, _, _ in results)
+    queries = [count for _, _, count in results if count is not None]
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, status, _ in results if status >= 400),
+        'rps': round(len(results) / total, 1) if total else None,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'queries': round(sum(queries) / len(queries), 1) if queries else None,
+    }
+
+
+# Métricas comparadas con la línea base y si más alto es peor
+COMPARED_METRICS = {'p50_ms': True, 'p95_ms': True, 'p99_ms': True, 'queries': True, 'rps': False}
+
+
+def compare(results, baseline, threshold=0.10):
+    """
+    Diferencias contra una línea base guardada. Devuelve filas
+    (escenario, métrica, antes, ahora, cambio relativo, empeoró).
+    """
+    rows = []
+    for name, summary in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS.items():
+            before, after = previous.get(metric), summary.get(metric)
+            if before is None or after is None:
+                continue
+            if before:
+                change = (after - before) / before
+            else:
+                change = math.inf if after else 0.0
+            worse = change > threshold if higher_is_worse else change < -threshold
+            rows.append((name, metric, before, after, change, worse))
+    return rows
+
+
+# Micro-benchmark de serialización: serializer de DRF + JSONRenderer contra
+# ValuesSerializer + FastJSONRenderer, desde el queryset hasta los bytes.
+SERIALIZER_BENCHMARKS = {
+    'cars': (lambda: with_effective_price(Car.objects.select_related('created_by')), CarValuesSerializer),
+    'motorcycles': (
+        lambda: with_effective_price(Motorcycle.objects.select_related('created_by')), MotorcycleValuesSerializer,
+    ),
+    'featured': (lambda: FeaturedItem.objects.all(), FeaturedItemValuesSerializer),
+    'discounts': (lambda: Discount.objects.with_new_price(), DiscountValuesSerializer),
+}
+
+
+def benchmark_serializer(name, rows=500, repeat=10):
+    """
+    Mejor tiempo de ``repeat`` ejecuciones de cada camino sobre las mismas
+    ``rows`` filas; también indica si ambos producen los mismos bytes.
+    """
+    get_queryset, values_serializer_class = SERIALIZER_BENCHMARKS[name]
+    request = Request(APIRequestFactory().get('/', SERVER_NAME='localhost'))
+    context = {'request': request}
+    # Las filas se fijan por id para que ambos caminos lean lo mismo
+    ids = list(get_queryset().order_by('-id').values_list('id', flat=True)[:rows])
+
+    def drf():
+        queryset = get_queryset().filter(pk__in=ids).order_by('-id')
+        data = values_serializer_class.serializer_class(queryset, many=True, context=context).data
+        return JSONRenderer().render(data)
+
+    def fast():
+        serializer = values_serializer_class(context=context)
+        queryset = serializer.project(get_queryset().filter(pk__in=ids).order_by('-id'))
+        return FastJSONRenderer().render(serializer.to_representation(queryset))
+
+    timings = {}
+    for label, function in (('drf', drf), ('fast', fast)):
+        best = math.inf
+        for _ in range(repeat):
+            start = time.perf_counter()
+            content = function()
+            best = min(best, time.perf_counter() - start)
+        timings[label] = (best, content)
+    drf_time, drf_content = timings['drf']
+    fast_time, fast_content = timings['fast']
+    return {
+        'rows': len(ids),
+        'drf_ms': round(drf_time * 1000, 2),
+        'fast_ms': round(fast_time * 1000, 2),
+        'speedup': round(drf_time / fast_time, 1) if fast_time else None,
+        'identical': drf_content == fast_content,
+    }
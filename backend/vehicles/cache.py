@@ -0,0 +1,163 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.http import urlencode
+from rest_framework.response import Response
+
+# Cada endpoint cacheado depende de uno o más "namespaces". Escribir un
+# modelo cambia la generación de su namespace y con eso todas las claves
+# anteriores quedan huérfanas (y expiran solas), sin tener que recorrerlas.
+NAMESPACE_CARS = 'cars'
+NAMESPACE_MOTORCYCLES = 'motorcycles'
+NAMESPACE_FEATURED = 'featured'
+NAMESPACE_DISCOUNTS = 'discounts'
+
+KEY_PREFIX = 'catalogue'
+# Una generación que vence solo deja huérfanas las respuestas anteriores
+GENERATION_TIMEOUT = 24 * 60 * 60
+
+
+def get_cache():
+    return caches[getattr(settings, 'CATALOGUE_CACHE_ALIAS', 'default')]
+
+
+def is_shared_cache():
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def get_timeout():
+    """
+    Las generaciones las cambian todos los procesos que escriben: la API, el
+    worker de imágenes y los comandos (expire_discounts, sync_snapshots,
+    import_inventory). Con una caché propia de cada proceso (LocMem, la de
+    por defecto) lo que escriben los demás no llega, así que las respuestas
+    duran a lo sumo CATALOGUE_LOCAL_CACHE_TIMEOUT.
+    """
+    timeout = getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 300)
+    if is_shared_cache():
+        return timeout
+    return min(timeout, getattr(settings, 'CATALOGUE_LOCAL_CACHE_TIMEOUT', 30))
+
+
+class CacheCounters:
+    # Contadores de aciertos/fallos por vista, propios de cada proceso
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+    def record(self, name, hit):
+        with self._lock:
+            self._counts[name]['hits' if hit else 'misses'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            views = {name: dict(counts) for name, counts in self._counts.items()}
+        totals = {
+            'hits': sum(counts['hits'] for counts in views.values()),
+            'misses': sum(counts['misses'] for counts in views.values()),
+        }
+        return {'views': views, 'totals': totals}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+counters = CacheCounters()
+
+
+def _generation_key(namespace):
+    return f'{KEY_PREFIX}:generation:{namespace}'
+
+
+def _new_generation():
+    # (token, momento del cambio); el momento sirve como Last-Modified
+    return (uuid.uuid4().hex, time.time())
+
+
+def get_generations(namespaces):
+    cache = get_cache()
+    keys = [_generation_key(namespace) for namespace in namespaces]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Una generación nueva nunca coincide con una anterior, aunque
+            # la clave se haya perdido por desalojo.
+            cache.add(key, _new_generation(), GENERATION_TIMEOUT)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(namespace):
+    get_cache().set(_generation_key(namespace), _new_generation(), GENERATION_TIMEOUT)
+
+
+def normalize_query_params(query_params):
+    items = sorted(
+        (key, value)
+        for key, values in query_params.lists()
+        for value in values
+        if value != ''
+    )
+    return urlencode(items)
+
+
+def build_cache_key(request, namespaces, variant=''):
+    generations = get_generations(namespaces)
+    # El host forma parte de la clave porque las respuestas llevan URLs
+    # absolutas; va resumido para no pasar el largo máximo de memcached.
+    request_part = '|'.join([
+        request.scheme,
+        request.get_host(),
+        request.path,
+        normalize_query_params(request.query_params),
+        variant,
+    ])
+    return ':'.join([
+        KEY_PREFIX,
+        'response',
+        '.'.join(f'{namespace}-{token}' for namespace, (token, _) in zip(namespaces, generations)),
+        hashlib.md5(request_part.encode('utf-8'), usedforsecurity=False).hexdigest(),
+    ])
+
+
+class CachedResponseMixin:
+    """
+    Cachea los datos serializados de las respuestas GET exitosas. Va antes de
+    la vista genérica en la herencia; la autenticación y los permisos se
+    siguen comprobando en cada petición porque DRF los ejecuta antes de get().
+    Con ConditionalGetMixin el ETag, que sale de la base, forma parte de la
+    clave: esas respuestas nunca son más viejas que las filas.
+    """
+    cache_namespaces = ()
+
+    def get_cache_variant(self):
+        # Algo que cambia sin escrituras (p. ej. con el tiempo) y debe separar la caché
+        return ''
+
+    def get(self, request, *args, **kwargs):
+        cache = get_cache()
+        variant = getattr(self, 'etag', None) or self.get_cache_variant()
+        key = build_cache_key(request, self.cache_namespaces, variant)
+        name = self.__class__.__name__
+
+        data = cache.get(key)
+        if data is not None:
+            counters.record(name, hit=True)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        counters.record(name, hit=False)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, get_timeout())
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,191 @@
+import gzip
+import time
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .metrics import observe_compression
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Solo datos de la API. Nada de HTML (admin, login, API navegable): lleva el
+# token CSRF junto a texto del usuario y comprimirlo lo expone a BREACH.
+# Imágenes y estáticos ya vienen comprimidos.
+COMPRESSED_PATH_PREFIX = '/api/'
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+}
+# Niveles pensados para respuestas dinámicas: casi la misma razón que el
+# máximo con una fracción del tiempo de CPU.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Códigos sin cuerpo o con un rango de bytes que no se puede recodificar
+SKIPPED_STATUS_CODES = {204, 206, 304}
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+    def compressor(self):
+        return GzipStream()
+
+
+class GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        # Z_SYNC_FLUSH para que cada trozo llegue al cliente sin esperar al final
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def compress(self, data):
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+
+    def compressor(self):
+        return BrotliStream()
+
+
+class BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+# En orden de preferencia del servidor cuando el cliente acepta varios con igual q
+ENCODERS = [encoder for encoder in (BrotliEncoder() if brotli else None, GzipEncoder()) if encoder]
+
+
+def parse_accept_encoding(header):
+    """{'gzip': 1.0, 'br': 0.5, '*': 0.0} a partir de Accept-Encoding."""
+    codings = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def negotiate_encoding(header):
+    codings = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for encoder in ENCODERS:
+        quality = codings.get(encoder.name, codings.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoder, quality
+    return best
+
+
+def _is_compressible(request, response):
+    if not request.path.startswith(COMPRESSED_PATH_PREFIX):
+        return False
+    # Respuestas que usan o renuevan el token CSRF (BREACH)
+    if request.META.get('CSRF_COOKIE_NEEDS_UPDATE') or settings.CSRF_COOKIE_NAME in response.cookies:
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return content_type in COMPRESSIBLE_TYPES
+
+
+class CompressionMiddleware:
+    """
+    Comprime las respuestas JSON/NDJSON/CSV de /api/ con brotli (si está
+    instalado) o gzip según Accept-Encoding. Las respuestas normales solo se
+    comprimen desde COMPRESSION_MIN_SIZE bytes y si el resultado es menor;
+    las de streaming (exportaciones) se comprimen trozo a trozo sin perder
+    el streaming. El ETag pasa a débil (W/), que If-None-Match sigue
+    aceptando. Tiempo y razón de compresión van a /api/metrics/.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.status_code == 304 and response.has_header('ETag'):
+            # Un 304 repite el Vary de la respuesta completa que valida
+            patch_vary_headers(response, ('Accept-Encoding',))
+        if (
+            response.status_code < 200
+            or response.status_code in SKIPPED_STATUS_CODES
+            or response.has_header('Content-Encoding')
+            or not _is_compressible(request, response)
+        ):
+            return response
+
+        # También sin comprimir: la respuesta depende de Accept-Encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        encoder = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoder is None or (response.streaming and response.is_async):
+            return response
+
+        if response.streaming:
+            response.streaming_content = self._stream(request, encoder, response.streaming_content)
+            # El tamaño comprimido no se conoce hasta terminar
+            del response.headers['Content-Length']
+        else:
+            start = time.perf_counter()
+            content = encoder.compress(response.content)
+            elapsed = time.perf_counter() - start
+            observe_compression(request, encoder.name, elapsed, len(response.content), len(content))
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoder.name
+        return response
+
+    def _stream(self, request, encoder, chunks):
+        compressor = encoder.compressor()
+        original = compressed = 0
+        elapsed = 0.0
+        for chunk in chunks:
+            # Solo se mide la compresión, no la generación de cada trozo
+            start = time.perf_counter()
+            output = compressor.compress(chunk)
+            elapsed += time.perf_counter() - start
+            original += len(chunk)
+            compressed += len(output)
+            if output:
+                yield output
+        start = time.perf_counter()
+        output = compressor.finish()
+        elapsed += time.perf_counter() - start
+        compressed += len(output)
+        yield output
+        observe_compression(request, encoder.name, elapsed, original, compressed)
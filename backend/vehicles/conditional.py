@@ -0,0 +1,77 @@
+import hashlib
+from datetime import datetime
+
+from django.db.models import Count, Max, Subquery, Value
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import normalize_query_params
+
+
+def summarize(queryset, dependencies=()):
+    """
+    Un único agregado: filas, MAX(created_at) y MAX(updated_at) del queryset
+    y, por cada modelo de ``dependencies``, filas y MAX(updated_at) de toda
+    su tabla como subconsultas sin correlación (se calculan una sola vez).
+    """
+    aggregates = {'count': Count('pk'), 'created': Max('created_at'), 'updated': Max('updated_at')}
+    for model in dependencies:
+        table = model.objects.order_by().annotate(table=Value(1)).values('table').annotate(
+            count=Count('pk'), updated=Max('updated_at')
+        )
+        name = model._meta.model_name
+        aggregates[f'{name}_count'] = Max(Subquery(table.values('count')))
+        aggregates[f'{name}_updated'] = Max(Subquery(table.values('updated')))
+    return queryset.order_by().aggregate(**aggregates)
+
+
+class ConditionalGetMixin:
+    """
+    Responde GET condicionales (If-None-Match / If-Modified-Since) con 304
+    sin serializar nada. Los validadores salen de la base, así que valen
+    para lo que escriba cualquier proceso: un único agregado (ver summarize)
+    sobre el queryset filtrado, o sobre la fila en el detalle, que incluye
+    los modelos de ``conditional_models`` de los que depende la respuesta.
+    Un borrado cambia el ETag pero no Last-Modified.
+
+    Va antes de CachedResponseMixin para que un 304 ni siquiera consulte
+    la caché de respuestas.
+    """
+    conditional_models = ()
+
+    def get_cache_variant(self):
+        return ''
+
+    def get_validators(self, request, kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if lookup is not None:
+            queryset = queryset.filter(**{self.lookup_field: lookup})
+        summary = summarize(queryset, self.conditional_models)
+        last_modified = max(
+            (value.timestamp() for value in summary.values() if isinstance(value, datetime)), default=0
+        )
+
+        parts = list(summary.values()) + [
+            self.get_cache_variant(),
+            request.path,
+            normalize_query_params(request.query_params),
+            request.accepted_renderer.format,
+        ]
+        digest = hashlib.md5(
+            '|'.join(str(part) for part in parts).encode('utf-8'), usedforsecurity=False
+        ).hexdigest()
+        return f'"{digest}"', int(last_modified)
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, kwargs)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        self.etag = etag
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,76 @@
+from django.db.models import DecimalField, F, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+
+from .cache import KEY_PREFIX, NAMESPACE_DISCOUNTS, bump_generation, get_cache, get_generations, get_timeout
+from .models import Car, Discount
+
+
+def expire_discounts(at=None):
+    """
+    Marca como inactivos los descuentos vencidos con un único UPDATE sobre
+    discount_active_window_idx. Devuelve cuántos cambiaron.
+    """
+    count = Discount.objects.expired(at or timezone.now()).update(is_active=False, updated_at=timezone.now())
+    if count:
+        # update() no envía post_save
+        bump_generation(NAMESPACE_DISCOUNTS)
+    return count
+
+
+def with_effective_price(queryset, at=None):
+    """
+    Anota cada auto o moto con ``discount_percentage`` (el mayor descuento
+    vigente, o None) y ``effective_price`` (el precio con ese descuento, o
+    el precio de lista) mediante una subconsulta correlacionada sobre
+    discount_active_window_idx. Se puede ordenar y filtrar por ambos.
+    """
+    if 'effective_price' in queryset.query.annotations:
+        return queryset
+    vehicle_type = 'car' if queryset.model is Car else 'motorcycle'
+    discount = (
+        Discount.objects.active(at)
+        .filter(vehicle_type=vehicle_type, **{vehicle_type: OuterRef('pk')})
+        .order_by('-discount_percentage', '-id')
+        .values('discount_percentage')[:1]
+    )
+    return queryset.annotate(
+        discount_percentage=Subquery(discount, output_field=DecimalField(max_digits=5, decimal_places=2)),
+    ).annotate(
+        effective_price=Coalesce(
+            Round(F('price') * (100 - F('discount_percentage')) / 100, 2),
+            F('price'),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ),
+    )
+
+
+def discount_window_marker():
+    """
+    Cambia cada vez que un descuento empieza o termina, aunque nadie haya
+    escrito en la base; se agrega a las claves de caché y ETags de lo que
+    muestra precios con descuento. Se guarda en la caché hasta el próximo
+    cambio (o hasta que se escriba un descuento), así que casi nunca consulta.
+    """
+    cache = get_cache()
+    token, _ = get_generations([NAMESPACE_DISCOUNTS])[0]
+    key = f'{KEY_PREFIX}:discount-window:{token}'
+    now = timezone.now()
+    cached = cache.get(key)
+    if cached is not None and cached[1] > now.timestamp():
+        return cached[0]
+
+    marks = Discount.objects.filter(is_active=True).aggregate(
+        started=Max('start_date', filter=Q(start_date__lte=now)),
+        ended=Max('end_date', filter=Q(end_date__lte=now)),
+        next_start=Min('start_date', filter=Q(start_date__gt=now)),
+        next_end=Min('end_date', filter=Q(end_date__gt=now)),
+    )
+    marker = '{}|{}'.format(*[
+        marks[name].timestamp() if marks[name] else 0 for name in ('started', 'ended')
+    ])
+    upcoming = [marks[name] for name in ('next_start', 'next_end') if marks[name]]
+    valid_until = min(upcoming).timestamp() if upcoming else now.timestamp() + get_timeout()
+    timeout = max(1, min(valid_until - now.timestamp(), get_timeout()))
+    cache.set(key, (marker, valid_until), timeout)
+    return marker
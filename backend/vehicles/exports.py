@@ -0,0 +1,184 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .discounts import with_effective_price
+from .filters import CarFilter, MotorcycleFilter
+from .models import Car, Motorcycle, ContactMessage, Subscriber
+
+# Filas que lee cada viaje al cursor del servidor y filas por cada trozo
+# enviado al cliente; la memoria no depende del total de filas.
+EXPORT_CHUNK_SIZE = 2000
+ROWS_PER_WRITE = 500
+
+FORMAT_CSV = 'csv'
+FORMAT_NDJSON = 'ndjson'
+CONTENT_TYPES = {
+    FORMAT_CSV: 'text/csv',
+    FORMAT_NDJSON: 'application/x-ndjson',
+}
+
+
+def _date(value):
+    return value.strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+def _yes_no(value):
+    return 'Sí' if value else 'No'
+
+
+def _status(value):
+    return 'Activo' if value else 'Inactivo'
+
+
+class Column:
+    """
+    Una columna exportada: ``lookup`` es lo que se pide a values_list(),
+    ``key`` el nombre en NDJSON y ``to_csv`` el formato legible del CSV.
+    """
+
+    def __init__(self, lookup, header, key=None, to_csv=None):
+        self.lookup = lookup
+        self.header = header
+        self.key = key or lookup
+        self.to_csv = to_csv
+
+
+class Export:
+    def __init__(self, model, filename, columns, ordering, filterset_class=None, prepare=None):
+        self.model = model
+        self.filename = filename
+        self.columns = columns
+        self.ordering = ordering
+        self.filterset_class = filterset_class
+        # Anotaciones que necesitan las columnas o los filtros
+        self.prepare = prepare
+
+    def get_queryset(self):
+        queryset = self.model.objects.order_by(*self.ordering)
+        return self.prepare(queryset) if self.prepare else queryset
+
+    def rows(self, queryset):
+        # values_list evita instanciar modelos; iterator() usa un cursor del
+        # servidor y no llena la caché del queryset.
+        lookups = [column.lookup for column in self.columns]
+        return queryset.values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+VEHICLE_COLUMNS = [
+    Column('id', 'ID'),
+    Column('title', 'Título'),
+    Column('brand', 'Marca'),
+    Column('model', 'Modelo'),
+    Column('year', 'Año'),
+    Column('price', 'Precio'),
+    Column('effective_price', 'Precio con Descuento'),
+    Column('discount_percentage', 'Descuento (%)'),
+    Column('color', 'Color'),
+    Column('engine', 'Motor'),
+    Column('mileage', 'Kilometraje'),
+    Column('fuel_type', 'Combustible'),
+]
+
+EXPORTS = {
+    'subscribers': Export(
+        Subscriber, 'suscriptores',
+        [
+            Column('email', 'Email'),
+            Column('subscription_date', 'Fecha de Suscripción', to_csv=_date),
+            Column('is_active', 'Estado', to_csv=_status),
+        ],
+        ordering=['-subscription_date'],
+    ),
+    'messages': Export(
+        ContactMessage, 'mensajes_contacto',
+        [
+            Column('name', 'Nombre'),
+            Column('email', 'Email'),
+            Column('phone', 'Teléfono'),
+            Column('message', 'Mensaje'),
+            Column('date', 'Fecha', to_csv=_date),
+            Column('is_read', 'Leído', to_csv=_yes_no),
+        ],
+        ordering=['-date'],
+    ),
+    'cars': Export(
+        Car, 'autos',
+        VEHICLE_COLUMNS + [
+            Column('transmission', 'Transmisión'),
+            Column('is_sold', 'Vendido', to_csv=_yes_no),
+            Column('created_at', 'Fecha de Alta', to_csv=_date),
+            Column('created_by__username', 'Creado por', key='created_by'),
+        ],
+        ordering=['-created_at', '-id'],
+        filterset_class=CarFilter,
+        prepare=with_effective_price,
+    ),
+    'motorcycles': Export(
+        Motorcycle, 'motos',
+        VEHICLE_COLUMNS + [
+            Column('category', 'Categoría'),
+            Column('is_sold', 'Vendido', to_csv=_yes_no),
+            Column('created_at', 'Fecha de Alta', to_csv=_date),
+            Column('created_by__username', 'Creado por', key='created_by'),
+        ],
+        ordering=['-created_at', '-id'],
+        filterset_class=MotorcycleFilter,
+        prepare=with_effective_price,
+    ),
+}
+
+
+class Echo:
+    # Pseudo-archivo: csv.writer escribe y devuelve la línea en vez de guardarla
+    def write(self, value):
+        return value
+
+
+def stream_csv(export, rows):
+    writer = csv.writer(Echo())
+    formatters = [column.to_csv for column in export.columns]
+    yield writer.writerow([column.header for column in export.columns])
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow([
+            format_value(value) if format_value else value
+            for format_value, value in zip(formatters, row)
+        ]))
+        if len(buffer) >= ROWS_PER_WRITE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_ndjson(export, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    keys = [column.key for column in export.columns]
+    buffer = []
+    for row in rows:
+        buffer.append(encoder.encode(dict(zip(keys, row))) + '\n')
+        if len(buffer) >= ROWS_PER_WRITE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+STREAMERS = {
+    FORMAT_CSV: stream_csv,
+    FORMAT_NDJSON: stream_ndjson,
+}
+
+
+def export_response(export, queryset, export_format):
+    content = STREAMERS[export_format](export, export.rows(queryset))
+    response = StreamingHttpResponse(
+        (chunk.encode('utf-8') for chunk in content),
+        content_type=f'{CONTENT_TYPES[export_format]}; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export.filename}.{export_format}"'
+    # Evita que un proxy (nginx) acumule la respuesta antes de enviarla
+    response['X-Accel-Buffering'] = 'no'
+    return response
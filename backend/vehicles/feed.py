@@ -0,0 +1,52 @@
+from django.db.models import CharField, F, Value
+
+from .discounts import with_effective_price
+from .models import Car, Motorcycle
+
+# Columnas comunes de la proyección que comparten autos y motos en el UNION.
+FEED_FIELDS = (
+    'id', 'title', 'brand', 'model', 'year', 'price', 'color', 'mileage',
+    'fuel_type', 'image', 'image_variants', 'created_at', 'is_sold',
+)
+
+# Campos por los que se pueden ordenar el feed y los listados
+# (?ordering=price, ?ordering=-effective_price...)
+FEED_ORDERING_FIELDS = ('created_at', 'price', 'effective_price', 'year', 'mileage')
+
+
+def car_feed_queryset(queryset=None):
+    if queryset is None:
+        queryset = Car.objects.all()
+    # Las anotaciones se declaran en el mismo orden en ambos modelos para
+    # que las columnas del UNION coincidan.
+    queryset = with_effective_price(queryset)
+    return queryset.values(*FEED_FIELDS, 'discount_percentage', 'effective_price').annotate(
+        vehicle_type=Value('car', output_field=CharField()),
+        feed_transmission=F('transmission'),
+        feed_category=Value(None, output_field=CharField()),
+    )
+
+
+def motorcycle_feed_queryset(queryset=None):
+    if queryset is None:
+        queryset = Motorcycle.objects.all()
+    queryset = with_effective_price(queryset)
+    return queryset.values(*FEED_FIELDS, 'discount_percentage', 'effective_price').annotate(
+        vehicle_type=Value('motorcycle', output_field=CharField()),
+        feed_transmission=Value(None, output_field=CharField()),
+        feed_category=F('category'),
+    )
+
+
+def vehicle_ordering(value, tie_breakers=('id',)):
+    descending = value.startswith('-')
+    field = value.lstrip('-')
+    if field not in FEED_ORDERING_FIELDS:
+        descending, field = True, 'created_at'
+    prefix = '-' if descending else ''
+    return [prefix + field] + [prefix + tie_breaker for tie_breaker in tie_breakers]
+
+
+def feed_ordering(value):
+    # Siempre se desempata por id y tipo, porque los ids se repiten entre tablas
+    return vehicle_ordering(value, ('id', 'vehicle_type'))
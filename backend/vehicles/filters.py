@@ -0,0 +1,44 @@
+import django_filters
+
+from .models import Car, Motorcycle
+
+# Rangos (__gte/__lte) y filtros exactos/múltiples (__in, separados por comas)
+# que se traducen directamente a la consulta SQL.
+RANGE_LOOKUPS = ['gte', 'lte']
+CHOICE_LOOKUPS = ['exact', 'in']
+
+
+class EffectivePriceFilterSet(django_filters.FilterSet):
+    # Sobre las anotaciones de discounts.with_effective_price(); el queryset
+    # que recibe el FilterSet tiene que venir anotado.
+    effective_price__gte = django_filters.NumberFilter(field_name='effective_price', lookup_expr='gte')
+    effective_price__lte = django_filters.NumberFilter(field_name='effective_price', lookup_expr='lte')
+    on_sale = django_filters.BooleanFilter(field_name='discount_percentage', lookup_expr='isnull', exclude=True)
+
+
+class CarFilter(EffectivePriceFilterSet):
+    class Meta:
+        model = Car
+        fields = {
+            'price': RANGE_LOOKUPS,
+            'year': ['exact'] + RANGE_LOOKUPS,
+            'mileage': RANGE_LOOKUPS,
+            'brand': CHOICE_LOOKUPS,
+            'fuel_type': CHOICE_LOOKUPS,
+            'transmission': CHOICE_LOOKUPS,
+            'is_sold': ['exact'],
+        }
+
+
+class MotorcycleFilter(EffectivePriceFilterSet):
+    class Meta:
+        model = Motorcycle
+        fields = {
+            'price': RANGE_LOOKUPS,
+            'year': ['exact'] + RANGE_LOOKUPS,
+            'mileage': RANGE_LOOKUPS,
+            'brand': CHOICE_LOOKUPS,
+            'fuel_type': CHOICE_LOOKUPS,
+            'category': CHOICE_LOOKUPS,
+            'is_sold': ['exact'],
+        }
@@ -0,0 +1,132 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .storage import strip_hash
+
+# Anchos generados para cada imagen subida; nunca se amplía el original, así
+# que una imagen chica solo tendrá los anchos menores más su propio ancho.
+VARIANT_WIDTHS = (320, 640, 1024, 1600)
+
+# Formato -> (extensión, opciones de Pillow al guardar)
+VARIANT_FORMATS = {
+    'jpeg': ('jpg', {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('webp', {'format': 'WEBP', 'quality': 80, 'method': 6}),
+}
+
+VARIANTS_DIR = 'variants'
+
+# El original se reescribe sin metadatos EXIF y con este lado máximo
+MAX_ORIGINAL_SIZE = 2560
+ORIGINAL_FORMATS = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 85, 'method': 6},
+}
+
+
+def variant_name(image_name, width, extension):
+    directory, filename = os.path.split(strip_hash(image_name))
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, VARIANTS_DIR, f'{stem}-{width}w.{extension}')
+
+
+def variant_widths(original_width):
+    widths = [width for width in VARIANT_WIDTHS if width < original_width]
+    if original_width <= VARIANT_WIDTHS[-1]:
+        widths.append(original_width)
+    return widths or [VARIANT_WIDTHS[-1]]
+
+
+def open_image(file):
+    image = Image.open(file)
+    # Aplicar la orientación EXIF antes de descartar los metadatos
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _save(name, image, options):
+    buffer = BytesIO()
+    image.save(buffer, **options)
+    # Nunca se sobrescribe: el storage devuelve el nombre definitivo
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def generate_variants(image_field):
+    """
+    Genera las variantes redimensionadas (JPEG y WebP) de un ImageField y
+    devuelve el mapa que se guarda en ``image_variants``.
+    """
+    image_field.open('rb')
+    try:
+        image = open_image(image_field)
+        image.load()
+    finally:
+        image_field.close()
+
+    variants = {'source': image_field.name}
+    for width in variant_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for format_name, (extension, options) in VARIANT_FORMATS.items():
+            name = _save(variant_name(image_field.name, width, extension), resized, options)
+            variants.setdefault(format_name, {})[str(width)] = name
+    return variants
+
+
+def optimize_original(image_field):
+    """
+    Reescribe la imagen original: aplica la orientación EXIF, descarta los
+    metadatos (ubicación GPS, cámara...), limita el tamaño y la recomprime.
+    """
+    image_field.open('rb')
+    try:
+        image = Image.open(image_field)
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    finally:
+        image_field.close()
+
+    if image_format not in ORIGINAL_FORMATS:
+        return image_field.name
+    image.thumbnail((MAX_ORIGINAL_SIZE, MAX_ORIGINAL_SIZE), Image.LANCZOS)
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    # Pillow solo escribe EXIF si se le pasa explícitamente al guardar.
+    # Con nombres con hash el resultado es un archivo nuevo; se devuelve su nombre.
+    return _save(image_field.name, image, {'format': image_format, **ORIGINAL_FORMATS[image_format]})
+
+
+def needs_variants(instance):
+    return bool(instance.image) and (instance.image_variants or {}).get('source') != instance.image.name
+
+
+def process_instance_image(instance):
+    instance.image.name = optimize_original(instance.image)
+    # Como con el ImageField, los archivos de una imagen anterior no se borran
+    instance.image_variants = generate_variants(instance.image)
+    # update_fields vuelve a disparar post_save (invalida la caché) pero
+    # needs_variants() ya es falso, así que no se reprocesa.
+    instance.save(update_fields=['image', 'image_variants', 'updated_at'])
+
+
+def build_srcset(variants, build_url):
+    """{'webp': 'url 320w, url 640w', 'jpeg': '...'} a partir de image_variants."""
+    srcset = {}
+    for format_name in VARIANT_FORMATS:
+        sizes = (variants or {}).get(format_name)
+        if sizes:
+            srcset[format_name] = ', '.join(
+                f'{build_url(default_storage.url(name))} {width}w'
+                for width, name in sorted(sizes.items(), key=lambda item: int(item[0]))
+            )
+    return srcset or None
@@ -0,0 +1,164 @@
+import csv
+import io
+import json
+import mimetypes
+import os
+import zipfile
+from itertools import islice
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+
+from .cache import bump_generation
+from .jobs import enqueue_image_jobs
+from .models import Car, Motorcycle
+from .serializers import CarSerializer, MotorcycleSerializer
+from .signals import CACHE_NAMESPACES
+from .stats import invalidate_dashboard_stats
+
+# Filas validadas e insertadas por transacción
+IMPORT_BATCH_SIZE = 500
+# Tamaño máximo descomprimido de cada imagen del archivo ZIP
+MAX_IMAGE_SIZE = 20 * 1024 * 1024
+
+IMPORT_SERIALIZERS = {
+    Car: CarSerializer,
+    Motorcycle: MotorcycleSerializer,
+}
+
+
+class InventoryImportError(Exception):
+    """El archivo completo no se puede leer (formato, codificación, estructura)."""
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    if extension not in ('csv', 'json'):
+        raise InventoryImportError('El archivo debe ser .csv o .json')
+    return extension
+
+
+def read_rows(file, file_format):
+    """Devuelve las filas como diccionarios; las celdas vacías se omiten."""
+    try:
+        if file_format == 'csv':
+            text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+            try:
+                rows = list(csv.DictReader(text))
+            finally:
+                # Sin detach() el wrapper cierra el archivo de quien llama al liberarse
+                text.detach()
+        else:
+            rows = json.load(file)
+            if isinstance(rows, dict):
+                rows = rows.get('items')
+    except (UnicodeDecodeError, csv.Error, ValueError) as error:
+        raise InventoryImportError(f'No se pudo leer el archivo: {error}')
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise InventoryImportError('El JSON debe ser una lista de objetos o {"items": [...]}')
+    return [
+        {key.strip(): value for key, value in row.items() if key and value not in ('', None)}
+        for row in rows
+    ]
+
+
+class ImageArchive:
+    """Imágenes de un ZIP, buscadas por ruta dentro del archivo o por nombre."""
+
+    def __init__(self, file):
+        try:
+            self.zip = zipfile.ZipFile(file)
+        except zipfile.BadZipFile:
+            raise InventoryImportError('El archivo de imágenes debe ser un ZIP')
+        self.members = {}
+        for info in self.zip.infolist():
+            if not info.is_dir():
+                self.members.setdefault(info.filename, info)
+                self.members.setdefault(os.path.basename(info.filename), info)
+
+    def open(self, name):
+        info = self.members.get(name)
+        if info is None:
+            raise KeyError(name)
+        if info.file_size > MAX_IMAGE_SIZE:
+            raise ValueError(f'La imagen supera {MAX_IMAGE_SIZE // (1024 * 1024)} MB')
+        content_type = mimetypes.guess_type(info.filename)[0] or 'application/octet-stream'
+        return SimpleUploadedFile(
+            os.path.basename(info.filename), self.zip.read(info), content_type=content_type
+        )
+
+
+def _attach_image(row, images):
+    name = row.get('image')
+    if not isinstance(name, str):
+        return row, None
+    if images is None:
+        return row, {'image': ['Falta el archivo ZIP con las imágenes.']}
+    try:
+        return {**row, 'image': images.open(name)}, None
+    except KeyError:
+        return row, {'image': [f'"{name}" no está en el archivo de imágenes.']}
+    except ValueError as error:
+        return row, {'image': [str(error)]}
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _delete_stored_images(model, files):
+    # bulk_create guarda los archivos (pre_save) antes del INSERT: si la
+    # transacción se revierte quedarían en el storage sin fila que los use.
+    # El storage reutiliza archivos con el mismo contenido, así que solo se
+    # borran los que ninguna fila usa.
+    stored = {file.name: file.storage for file in files if file._committed}
+    used = set(model.objects.filter(image__in=stored).values_list('image', flat=True))
+    for name, storage in stored.items():
+        if name not in used:
+            storage.delete(name)
+
+
+def import_inventory(model, rows, user, images=None, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+    """
+    Valida las filas con el serializer del modelo y las inserta con
+    bulk_create, una transacción por lote. Una fila inválida no detiene la
+    importación: se informa en ``errors`` con su número (desde 1).
+
+    bulk_create no dispara post_save, así que aquí se hace lo que harían
+    las señales: encolar las imágenes e invalidar cachés y estadísticas. Si
+    un lote falla se borran las imágenes que llegó a guardar.
+    """
+    serializer_class = IMPORT_SERIALIZERS[model]
+    report = {'total': 0, 'valid': 0, 'created': 0, 'errors': []}
+
+    for batch in _batches(enumerate(rows, start=1), batch_size):
+        instances = []
+        for number, row in batch:
+            report['total'] += 1
+            data, errors = _attach_image(row, images)
+            if errors is None:
+                serializer = serializer_class(data=data)
+                if serializer.is_valid():
+                    report['valid'] += 1
+                    instances.append(model(**serializer.validated_data, created_by=user))
+                    continue
+                errors = serializer.errors
+            report['errors'].append({'row': number, 'errors': errors})
+
+        if instances and not dry_run:
+            uploads = [instance.image for instance in instances if instance.image and not instance.image._committed]
+            try:
+                with transaction.atomic():
+                    created = model.objects.bulk_create(instances)
+                    enqueue_image_jobs(created)
+            except Exception:
+                _delete_stored_images(model, uploads)
+                raise
+            report['created'] += len(created)
+
+    if report['created']:
+        bump_generation(CACHE_NAMESPACES[model])
+        invalidate_dashboard_stats()
+    return report
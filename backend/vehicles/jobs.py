@@ -0,0 +1,118 @@
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .images import needs_variants, process_instance_image
+from .models import ImageJob
+
+logger = logging.getLogger(__name__)
+
+# Espera antes de cada reintento: 30s, 60s, 120s...
+RETRY_BASE_DELAY = timedelta(seconds=30)
+# Un trabajo "running" más viejo que esto se considera abandonado (worker caído)
+STALE_AFTER = timedelta(minutes=10)
+
+
+def enqueue_image_job(instance):
+    """Encola el procesamiento de la imagen de un auto o moto, sin duplicados."""
+    vehicle_type = instance._meta.model_name
+    active = ImageJob.objects.filter(
+        **{vehicle_type: instance},
+        image_name=instance.image.name,
+        status__in=[ImageJob.STATUS_PENDING, ImageJob.STATUS_RUNNING],
+    )
+    if active.exists():
+        return None
+    return ImageJob.objects.create(
+        **{vehicle_type: instance},
+        vehicle_type=vehicle_type,
+        image_name=instance.image.name,
+    )
+
+
+def enqueue_image_jobs(instances):
+    """
+    Versión en lote para vehículos recién insertados con bulk_create (que no
+    dispara post_save); al ser nuevos no pueden tener trabajos pendientes.
+    """
+    return ImageJob.objects.bulk_create([
+        ImageJob(
+            **{instance._meta.model_name: instance},
+            vehicle_type=instance._meta.model_name,
+            image_name=instance.image.name,
+        )
+        for instance in instances
+        if instance.image
+    ])
+
+
+def claim_next_job():
+    """
+    Toma el siguiente trabajo disponible. SKIP LOCKED permite correr varios
+    workers en paralelo sin que dos tomen el mismo trabajo.
+    """
+    now = timezone.now()
+    # Abandonados sin intentos restantes: el worker cayó en el último intento
+    ImageJob.objects.filter(
+        status=ImageJob.STATUS_RUNNING, locked_at__lt=now - STALE_AFTER, attempts__gte=F('max_attempts'),
+    ).update(
+        status=ImageJob.STATUS_FAILED, locked_at=None, finished_at=now,
+        last_error='Abandonado por el worker sin intentos restantes',
+    )
+    with transaction.atomic():
+        job = (
+            ImageJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ImageJob.STATUS_PENDING, run_after__lte=now) |
+                Q(status=ImageJob.STATUS_RUNNING, locked_at__lt=now - STALE_AFTER, attempts__lt=F('max_attempts'))
+            )
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ImageJob.STATUS_RUNNING
+        job.locked_at = now
+        job.attempts += 1
+        job.save(update_fields=['status', 'locked_at', 'attempts'])
+    return job
+
+
+def run_job(job):
+    vehicle = job.vehicle
+    try:
+        # Si la imagen cambió desde que se encoló, el trabajo nuevo se encarga
+        if vehicle is not None and vehicle.image.name == job.image_name and needs_variants(vehicle):
+            process_instance_image(vehicle)
+    except Exception as error:
+        # Cualquier error (imagen inválida, DecompressionBombError, la base)
+        # cuenta como intento fallido en vez de dejar el trabajo en "running"
+        job.last_error = f'{error.__class__.__name__}: {error}'
+        if job.attempts >= job.max_attempts:
+            job.status = ImageJob.STATUS_FAILED
+            job.finished_at = timezone.now()
+            logger.error('Trabajo de imagen %s fallido: %s', job.pk, job.last_error)
+        else:
+            job.status = ImageJob.STATUS_PENDING
+            job.run_after = timezone.now() + RETRY_BASE_DELAY * (2 ** (job.attempts - 1))
+            logger.warning('Trabajo de imagen %s falló, se reintentará: %s', job.pk, job.last_error)
+    else:
+        job.status = ImageJob.STATUS_DONE
+        job.finished_at = timezone.now()
+    job.locked_at = None
+    job.save(update_fields=['status', 'last_error', 'run_after', 'locked_at', 'finished_at'])
+    return job
+
+
+def process_pending_jobs(limit=None):
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
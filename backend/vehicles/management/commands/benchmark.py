@@ -0,0 +1,116 @@
+import json
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from vehicles.benchmark import (
+    BENCHMARK_USERNAME,
+    SCENARIOS,
+    ClientRunner,
+    HttpRunner,
+    compare,
+    run_scenario,
+    scenario_context,
+)
+
+COLUMNS = ['requests', 'errors', 'rps', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'queries']
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide latencia (p50/p95/p99), peticiones por segundo y consultas por petición '
+        'de la API. Usar después de seed_benchmark.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenarios', nargs='*', metavar='scenario',
+            help=f'Escenarios a ejecutar (todos si no se indica): {", ".join(SCENARIOS)}',
+        )
+        parser.add_argument(
+            '--url', help='Servidor en marcha (p. ej. http://127.0.0.1:8000); sin esto se usa el cliente de pruebas',
+        )
+        parser.add_argument('--requests', type=int, default=200, help='Peticiones medidas por escenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Peticiones previas sin medir')
+        parser.add_argument('--concurrency', type=int, default=1, help='Peticiones simultáneas (solo con --url)')
+        parser.add_argument('--username', default=BENCHMARK_USERNAME)
+        parser.add_argument('--password', default=BENCHMARK_USERNAME)
+        parser.add_argument('--seed', type=int, default=0, help='Semilla para elegir ids y filtros')
+        parser.add_argument('--save', metavar='ARCHIVO', help='Guardar los resultados como línea base (JSON)')
+        parser.add_argument('--compare', metavar='ARCHIVO', help='Comparar con una línea base guardada')
+        parser.add_argument(
+            '--threshold', type=float, default=0.10,
+            help='Cambio relativo que se considera regresión (0.10 = 10%%)',
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true', help='Terminar con error si hay regresiones',
+        )
+
+    def handle(self, *args, **options):
+        if options['url']:
+            runner = HttpRunner(options['url'], options['username'], options['password'])
+        else:
+            if options['concurrency'] > 1:
+                raise CommandError('--concurrency solo se admite con --url')
+            runner = ClientRunner()
+        names = options['scenarios'] or list(SCENARIOS)
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f'Escenarios desconocidos: {", ".join(unknown)}')
+        context = scenario_context()
+
+        results = {}
+        for name in names:
+            summary = run_scenario(
+                runner, SCENARIOS[name], context, requests=options['requests'],
+                warmup=options['warmup'], concurrency=options['concurrency'], random_seed=options['seed'],
+            )
+            results[name] = summary
+            self.stdout.write(self._row(name, summary))
+            if summary['errors']:
+                self.stderr.write(f'{name}: {summary["errors"]} respuestas con error')
+
+        if options['compare']:
+            self._compare(results, options)
+        if options['save']:
+            self._save(results, options)
+
+    def _row(self, name, summary):
+        values = ' '.join(f'{column}={"-" if summary[column] is None else summary[column]}' for column in COLUMNS)
+        return f'{name:<14} {values}'
+
+    def _save(self, results, options):
+        baseline = {
+            'created_at': timezone.now().isoformat(),
+            'target': options['url'] or 'test-client',
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'results': results,
+        }
+        with open(options['save'], 'w') as file:
+            json.dump(baseline, file, indent=2)
+        self.stdout.write(f'Línea base guardada en {options["save"]}')
+
+    def _compare(self, results, options):
+        try:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'No se pudo leer la línea base: {error}')
+
+        regressions = 0
+        for name, metric, before, after, change, worse in compare(
+            results, baseline['results'], options['threshold']
+        ):
+            line = f'{name:<14} {metric:<8} {before} -> {after} ({change:+.1%})'
+            if worse:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f'{line} REGRESIÓN'))
+            else:
+                self.stdout.write(line)
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{regressions} métricas empeoraron más de {options["threshold"]:.0%}')
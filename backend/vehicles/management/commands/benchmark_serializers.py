@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from vehicles.benchmark import SERIALIZER_BENCHMARKS, benchmark_serializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara la serialización de listados con DRF y con los ValuesSerializer '
+        '(projections.py) sobre los datos actuales; comprueba que la salida sea idéntica.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'resources', nargs='*', metavar='resource',
+            help=f'Listados a medir (todos si no se indica): {", ".join(SERIALIZER_BENCHMARKS)}',
+        )
+        parser.add_argument('--rows', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=10, help='Se informa el mejor tiempo')
+
+    def handle(self, *args, **options):
+        names = options['resources'] or list(SERIALIZER_BENCHMARKS)
+        unknown = [name for name in names if name not in SERIALIZER_BENCHMARKS]
+        if unknown:
+            raise CommandError(f'Listados desconocidos: {", ".join(unknown)}')
+
+        different = []
+        for name in names:
+            result = benchmark_serializer(name, options['rows'], options['repeat'])
+            self.stdout.write(
+                f'{name:<12} rows={result["rows"]} drf={result["drf_ms"]} ms '
+                f'fast={result["fast_ms"]} ms speedup={result["speedup"]}x'
+            )
+            if not result['identical']:
+                different.append(name)
+        if different:
+            raise CommandError(f'La salida no coincide en: {", ".join(different)}')
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from vehicles.discounts import expire_discounts
+
+
+class Command(BaseCommand):
+    help = 'Desactiva los descuentos cuya fecha de fin ya pasó (para cron o como proceso)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=float,
+            help='Repetir cada tantos segundos en lugar de ejecutar una sola vez',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            expired = expire_discounts()
+            if expired or not options['every']:
+                self.stdout.write(f'{expired} descuentos vencidos desactivados')
+            if not options['every']:
+                break
+            time.sleep(options['every'])
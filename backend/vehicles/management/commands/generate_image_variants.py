@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from PIL import UnidentifiedImageError
+
+from vehicles.images import needs_variants, process_instance_image
+from vehicles.models import Car, Motorcycle
+
+
+class Command(BaseCommand):
+    help = 'Procesa en el momento (sin cola) las imágenes de autos y motos ya subidas'
+
+    models = {'cars': Car, 'motorcycles': Motorcycle}
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=sorted(self.models), action='append',
+            help='Procesar solo este modelo (se puede repetir)',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Regenerar también las imágenes que ya tienen variantes',
+        )
+
+    def handle(self, *args, **options):
+        for name in options['model'] or sorted(self.models):
+            model = self.models[name]
+            processed = failed = 0
+            queryset = model.objects.exclude(image='').only('id', 'image', 'image_variants').order_by('id')
+            for instance in queryset.iterator(chunk_size=200):
+                if not options['force'] and not needs_variants(instance):
+                    continue
+                try:
+                    process_instance_image(instance)
+                    processed += 1
+                except (OSError, UnidentifiedImageError) as error:
+                    failed += 1
+                    self.stderr.write(f'{name} #{instance.pk} ({instance.image.name}): {error}')
+            self.stdout.write(self.style.SUCCESS(f'{name}: {processed} procesadas, {failed} con error'))
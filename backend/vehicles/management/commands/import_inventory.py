@@ -0,0 +1,59 @@
+from contextlib import ExitStack
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from vehicles.imports import (
+    IMPORT_BATCH_SIZE,
+    ImageArchive,
+    InventoryImportError,
+    detect_format,
+    import_inventory,
+    read_rows,
+)
+from vehicles.models import Car, Motorcycle
+
+
+class Command(BaseCommand):
+    help = 'Carga masiva de autos o motos desde un CSV/JSON y un ZIP de imágenes'
+
+    models = {'cars': Car, 'motorcycles': Motorcycle}
+
+    def add_arguments(self, parser):
+        parser.add_argument('vehicle_type', choices=sorted(self.models))
+        parser.add_argument('file', help='Archivo .csv o .json con una fila por vehículo')
+        parser.add_argument('--images', help='ZIP con las imágenes referenciadas en la columna image')
+        parser.add_argument('--user', required=True, help='Usuario que figura como creador')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Solo validar, sin insertar')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'No existe el usuario "{options["user"]}"')
+
+        try:
+            with open(options['file'], 'rb') as file:
+                rows = read_rows(file, detect_format(options['file']))
+            with ExitStack() as stack:
+                images = None
+                if options['images']:
+                    images = ImageArchive(stack.enter_context(open(options['images'], 'rb')))
+                report = import_inventory(
+                    self.models[options['vehicle_type']], rows, user, images=images,
+                    batch_size=options['batch_size'], dry_run=options['dry_run'],
+                )
+        except (OSError, InventoryImportError) as error:
+            raise CommandError(str(error))
+
+        for error in report['errors']:
+            details = '; '.join(
+                f'{field}: {" ".join(str(message) for message in messages)}'
+                for field, messages in error['errors'].items()
+            )
+            self.stderr.write(f'Fila {error["row"]}: {details}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{report["total"]} filas, {report["valid"]} válidas, {report["created"]} creadas, '
+            f'{len(report["errors"])} con error'
+        ))
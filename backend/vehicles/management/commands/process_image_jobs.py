@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from vehicles.jobs import process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Worker que procesa la cola de imágenes subidas (tabla vehicles_imagejob)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Procesar los trabajos pendientes y terminar',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=2.0,
+            help='Segundos de espera cuando la cola está vacía (por defecto 2)',
+        )
+        parser.add_argument(
+            '--batch', type=int, default=20,
+            help='Trabajos por vuelta antes de refrescar la conexión (por defecto 20)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            processed = process_pending_jobs(limit=options['batch'])
+            if processed:
+                self.stdout.write(f'{processed} trabajos de imagen procesados')
+            if options['once'] and processed < options['batch']:
+                break
+            if not processed:
+                time.sleep(options['sleep'])
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from vehicles.benchmark import BENCHMARK_USERNAME, clear, seed
+
+
+class Command(BaseCommand):
+    help = 'Genera datos reproducibles para el benchmark (usuario "benchmark") o los borra con --clear'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cars', type=int, default=1000)
+        parser.add_argument('--motorcycles', type=int, default=1000)
+        parser.add_argument('--discounts', type=int, default=200)
+        parser.add_argument('--featured', type=int, default=50)
+        parser.add_argument('--subscribers', type=int, default=1000)
+        parser.add_argument('--password', default=BENCHMARK_USERNAME, help='Contraseña del usuario benchmark')
+        parser.add_argument('--seed', type=int, default=0, help='Semilla del generador aleatorio')
+        parser.add_argument('--clear', action='store_true', help='Borrar los datos generados antes')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(f'{clear()} filas borradas')
+        counts = (options['cars'], options['motorcycles'], options['discounts'],
+                  options['featured'], options['subscribers'])
+        if not any(counts):
+            return
+        created = seed(*counts, password=options['password'], random_seed=options['seed'])
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f'{count} {model._meta.verbose_name_plural}' for model, count in created.items()
+        )))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from vehicles.snapshots import SNAPSHOT_MODELS, VEHICLE_FIELDS, stale_snapshots, sync_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Detecta y corrige destacados y descuentos cuyo título, precio o imagen '
+        'no coinciden con el vehículo'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Solo informar las diferencias, sin corregirlas (sale con código 1 si hay)',
+        )
+
+    def handle(self, *args, **options):
+        drift = 0
+        for vehicle_model in VEHICLE_FIELDS:
+            if options['check']:
+                counts = {
+                    snapshot_model: stale_snapshots(vehicle_model, snapshot_model).count()
+                    for snapshot_model in SNAPSHOT_MODELS
+                }
+            else:
+                counts = sync_snapshots(vehicle_model)
+            for snapshot_model, count in counts.items():
+                drift += count
+                self.stdout.write(f'{snapshot_model.__name__} ({vehicle_model.__name__}): {count}')
+
+        if options['check']:
+            if drift:
+                self.stderr.write(f'{drift} copias desactualizadas')
+                raise SystemExit(1)
+            self.stdout.write(self.style.SUCCESS('Sin diferencias'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{drift} copias corregidas'))
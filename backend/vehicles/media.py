@@ -0,0 +1,152 @@
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .storage import is_hashed
+
+# Un nombre con hash nunca cambia de contenido: se cachea un año sin revalidar
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _file_etag(stat):
+    return f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+
+def parse_range(header, size):
+    """
+    Devuelve (inicio, fin) inclusivo para un único rango ``bytes=``, None si
+    la cabecera no aplica (se responde el archivo completo) o False si el
+    rango no es satisfacible.
+    """
+    match = RANGE_RE.match(header.strip())
+    # Varios rangos (multipart/byteranges) o unidades desconocidas: 200 completo
+    if not match or not any(match.groups()):
+        return None
+    # Un archivo vacío no tiene bytes que recortar: se envía completo
+    if size == 0:
+        return None
+    start, end = match.groups()
+    if start == '':
+        # bytes=-N: los últimos N bytes
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _if_range_matches(request, etag, mtime):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    date = parse_http_date_safe(if_range)
+    return date is not None and int(mtime) <= date
+
+
+def _stream_range(fullpath, start, end):
+    with open(fullpath, 'rb') as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _sendfile_response(path, fullpath):
+    mode = getattr(settings, 'MEDIA_SENDFILE', '')
+    if mode == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = fullpath
+    elif mode == 'x-accel-redirect':
+        response = HttpResponse()
+        prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + path
+    else:
+        return None
+    # El servidor web pone el cuerpo, el tipo y atiende Range por su cuenta
+    del response['Content-Type']
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Sirve MEDIA_ROOT. Con MEDIA_SENDFILE configurado Django solo calcula las
+    cabeceras y el servidor web envía el archivo; si no, se transmite por
+    partes con soporte de Range, sin leerlo entero en memoria.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Archivo no encontrado')
+    if not os.path.isfile(fullpath):
+        raise Http404('Archivo no encontrado')
+
+    stat = os.stat(fullpath)
+    etag = _file_etag(stat)
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    response = _sendfile_response(path, fullpath)
+    byte_range = None
+    if response is None:
+        if 'HTTP_RANGE' in request.META and _if_range_matches(request, etag, stat.st_mtime):
+            byte_range = parse_range(request.META['HTTP_RANGE'], stat.st_size)
+        if byte_range is False:
+            response = HttpResponse(status=416, content_type=content_type)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _stream_range(fullpath, start, end), status=206, content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = str(end - start + 1)
+        elif request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+            response['Content-Length'] = str(stat.st_size)
+        else:
+            response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+        response['Accept-Ranges'] = 'bytes'
+        if encoding:
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if is_hashed(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+
+    if byte_range is None:
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=int(stat.st_mtime), response=response
+        )
+        if not_modified is not response:
+            response.close()
+            return not_modified
+    return response
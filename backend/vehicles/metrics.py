@@ -0,0 +1,302 @@
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.permissions import BasePermission
+
+from .cache import counters as cache_counters
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'vehicles'
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+RATIO_BUCKETS = (1, 1.5, 2, 3, 5, 10, 20)
+
+# Consultas guardadas por petición para el log de peticiones lentas
+MAX_LOGGED_QUERIES = 50
+
+
+class Histogram:
+    """Histograma acumulado por combinación de etiquetas, propio de cada proceso."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def collect(self):
+        with self._lock:
+            return {labels: (list(counts), count, total) for labels, (counts, count, total) in self._series.items()}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, (counts, count, total) in sorted(self.collect().items()):
+            base = _format_labels(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{base}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{base}}} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values = defaultdict(int)
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f'{self.name}{{{_format_labels(zip(self.label_names, labels))}}} {value}')
+        return lines
+
+
+def _format_labels(pairs):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{name}="{escape(value)}"' for name, value in pairs)
+
+
+VIEW_LABELS = ('view', 'method')
+
+requests_total = Counter(
+    f'{PREFIX}_requests_total', 'Peticiones atendidas', ('view', 'method', 'status'),
+)
+request_duration = Histogram(
+    f'{PREFIX}_request_duration_seconds', 'Tiempo total de la vista', VIEW_LABELS, DURATION_BUCKETS,
+)
+db_queries = Histogram(
+    f'{PREFIX}_db_queries', 'Consultas SQL por petición', VIEW_LABELS, QUERY_COUNT_BUCKETS,
+)
+db_duration = Histogram(
+    f'{PREFIX}_db_duration_seconds', 'Tiempo en la base de datos por petición', VIEW_LABELS, DURATION_BUCKETS,
+)
+phase_duration = Histogram(
+    f'{PREFIX}_phase_duration_seconds', 'Tiempo por fase (serializer, ...) por petición',
+    VIEW_LABELS + ('phase',), DURATION_BUCKETS,
+)
+response_size = Histogram(
+    f'{PREFIX}_response_size_bytes', 'Tamaño del cuerpo enviado (comprimido si corresponde)',
+    VIEW_LABELS, SIZE_BUCKETS,
+)
+compression_duration = Histogram(
+    f'{PREFIX}_compression_duration_seconds', 'Tiempo de compresión de la respuesta',
+    ('view', 'encoding'), DURATION_BUCKETS,
+)
+compression_ratio = Histogram(
+    f'{PREFIX}_compression_ratio', 'Tamaño original / tamaño comprimido',
+    ('view', 'encoding'), RATIO_BUCKETS,
+)
+
+METRICS = [
+    requests_total, request_duration, db_queries, db_duration, phase_duration, response_size,
+    compression_duration, compression_ratio,
+]
+
+
+class RequestMetrics:
+    """Lo medido durante una petición; vive en un ContextVar."""
+
+    def __init__(self, keep_queries):
+        self.query_count = 0
+        self.query_time = 0.0
+        self.queries = [] if keep_queries else None
+        self.phases = defaultdict(float)
+        self.depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Envoltorio de connection.execute_wrapper()
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.query_count += 1
+            self.query_time += elapsed
+            if self.queries is not None and len(self.queries) < MAX_LOGGED_QUERIES:
+                self.queries.append((elapsed, sql))
+
+
+_current = ContextVar('vehicles_request_metrics', default=None)
+
+
+@contextmanager
+def timer(phase):
+    """
+    Suma el tiempo del bloque a la fase ``phase`` de la petición en curso.
+    Los bloques anidados de cualquier fase no se cuentan dos veces; fuera de
+    una petición no hace nada.
+    """
+    state = _current.get()
+    if state is None or state.depth:
+        yield
+        return
+    state.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        state.phases[phase] += time.perf_counter() - start
+        state.depth -= 1
+
+
+class TimedSerializerMixin:
+    # Mide la serialización de la respuesta como fase "serializer"
+    def to_representation(self, instance):
+        with timer('serializer'):
+            return super().to_representation(instance)
+
+
+def _view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    # La ruta (api/cars/<int:pk>/) y no la URL, para no crear una serie por id
+    return match.route or match.view_name
+
+
+def observe_compression(request, encoding, seconds, original_size, compressed_size):
+    labels = (_view_label(request), encoding)
+    compression_duration.observe(labels, seconds)
+    if compressed_size:
+        compression_ratio.observe(labels, original_size / compressed_size)
+
+
+def _response_size(response):
+    if response.streaming:
+        length = response.get('Content-Length')
+        return int(length) if length else None
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """
+    Mide cada petición: tiempo total, consultas SQL (cantidad y tiempo),
+    fases como la serialización y tamaño de la respuesta. Los histogramas
+    se publican en /api/metrics/. Con SLOW_REQUEST_MS se registran las
+    peticiones más lentas junto con su SQL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        slow_ms = settings.SLOW_REQUEST_MS
+        state = RequestMetrics(keep_queries=bool(slow_ms))
+        token = _current.set(state)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(state))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - start
+
+        labels = (_view_label(request), request.method)
+        requests_total.inc(labels + (str(response.status_code),))
+        request_duration.observe(labels, elapsed)
+        db_queries.observe(labels, state.query_count)
+        db_duration.observe(labels, state.query_time)
+        for phase, seconds in state.phases.items():
+            phase_duration.observe(labels + (phase,), seconds)
+        size = _response_size(response)
+        if size is not None:
+            response_size.observe(labels, size)
+
+        if slow_ms and elapsed * 1000 >= slow_ms:
+            log_slow_request(request, labels[0], elapsed, state)
+        return response
+
+
+def log_slow_request(request, view, elapsed, state):
+    queries = ''.join(
+        f'\n  {seconds * 1000:.1f} ms  {sql}'
+        for seconds, sql in sorted(state.queries, key=lambda item: item[0], reverse=True)
+    )
+    logger.warning(
+        'Petición lenta: %s %s (%s) %.0f ms, %d consultas en %.0f ms, fases %s%s',
+        request.method, request.get_full_path(), view, elapsed * 1000,
+        state.query_count, state.query_time * 1000,
+        {phase: round(seconds * 1000, 1) for phase, seconds in state.phases.items()},
+        queries,
+    )
+
+
+def expose_metrics():
+    """Todas las métricas en el formato de texto de Prometheus."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.expose())
+
+    # Contadores de la caché de respuestas (cache.py)
+    snapshot = cache_counters.snapshot()
+    for kind in ('hits', 'misses'):
+        name = f'{PREFIX}_response_cache_{kind}_total'
+        lines.append(f'# HELP {name} Respuestas cacheadas: {kind}')
+        lines.append(f'# TYPE {name} counter')
+        for view, counts in sorted(snapshot['views'].items()):
+            lines.append(f'{name}{{{_format_labels([("view", view)])}}} {counts[kind]}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsPermission(BasePermission):
+    """Con METRICS_TOKEN exige "Authorization: Bearer <token>"; si no, un usuario autenticado."""
+
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        if not token:
+            return bool(request.user and request.user.is_authenticated)
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        return hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+
+def reset_metrics():
+    for metric in METRICS:
+        metric.reset()
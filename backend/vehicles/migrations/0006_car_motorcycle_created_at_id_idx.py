@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0005_discount_image_url_discount_original_price_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['-created_at', '-id'], name='car_created_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motorcycle',
+            index=models.Index(fields=['-created_at', '-id'], name='motorcycle_created_at_id_idx'),
+        ),
+    ]
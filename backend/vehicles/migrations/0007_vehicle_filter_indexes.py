@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0006_car_motorcycle_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['brand'], name='car_brand_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['price'], name='car_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['year'], name='car_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['mileage'], name='car_mileage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['fuel_type'], name='car_fuel_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['is_sold', 'transmission'], name='car_sold_transmission_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motorcycle',
+            index=models.Index(fields=['brand'], name='motorcycle_brand_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motorcycle',
+            index=models.Index(fields=['price'], name='motorcycle_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motorcycle',
+            index=models.Index(fields=['year'], name='motorcycle_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motorcycle',
+            index=models.Index(fields=['mileage'], name='motorcycle_mileage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motorcycle',
+            index=models.Index(fields=['fuel_type'], name='motorcycle_fuel_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motorcycle',
+            index=models.Index(fields=['is_sold', 'category'], name='motorcycle_sold_category_idx'),
+        ),
+    ]
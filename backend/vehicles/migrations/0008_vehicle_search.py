@@ -0,0 +1,92 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:36
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+
+# Configuración de búsqueda en español que además ignora los acentos
+CREATE_SEARCH_CONFIG = """
+CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish);
+ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+"""
+
+DROP_SEARCH_CONFIG = "DROP TEXT SEARCH CONFIGURATION IF EXISTS spanish_unaccent;"
+
+# El vector se recalcula en la base de datos en cada INSERT/UPDATE, de modo que
+# también queda al día con bulk_create, QuerySet.update o SQL directo.
+SEARCH_VECTOR_EXPRESSION = """
+    setweight(to_tsvector('spanish_unaccent', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('spanish_unaccent', coalesce({row}brand, '') || ' ' || coalesce({row}model, '')), 'A') ||
+    setweight(to_tsvector('spanish_unaccent', coalesce({row}description, '')), 'C')
+"""
+
+CREATE_SEARCH_TRIGGER = """
+CREATE FUNCTION vehicles_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {expression};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER vehicles_car_search_vector
+    BEFORE INSERT OR UPDATE ON vehicles_car
+    FOR EACH ROW EXECUTE FUNCTION vehicles_search_vector_update();
+CREATE TRIGGER vehicles_motorcycle_search_vector
+    BEFORE INSERT OR UPDATE ON vehicles_motorcycle
+    FOR EACH ROW EXECUTE FUNCTION vehicles_search_vector_update();
+
+UPDATE vehicles_car SET search_vector = {backfill};
+UPDATE vehicles_motorcycle SET search_vector = {backfill};
+""".format(
+    expression=SEARCH_VECTOR_EXPRESSION.format(row='NEW.'),
+    backfill=SEARCH_VECTOR_EXPRESSION.format(row=''),
+)
+
+DROP_SEARCH_TRIGGER = """
+DROP TRIGGER IF EXISTS vehicles_car_search_vector ON vehicles_car;
+DROP TRIGGER IF EXISTS vehicles_motorcycle_search_vector ON vehicles_motorcycle;
+DROP FUNCTION IF EXISTS vehicles_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0007_vehicle_filter_indexes'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        TrigramExtension(),
+        migrations.RunSQL(CREATE_SEARCH_CONFIG, DROP_SEARCH_CONFIG),
+        migrations.AddField(
+            model_name='car',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='motorcycle',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_SEARCH_TRIGGER, DROP_SEARCH_TRIGGER),
+        migrations.AddIndex(
+            model_name='car',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='car_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title', 'brand', 'model'], name='car_trgm_idx', opclasses=['gin_trgm_ops', 'gin_trgm_ops', 'gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='motorcycle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='motorcycle_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motorcycle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title', 'brand', 'model'], name='motorcycle_trgm_idx', opclasses=['gin_trgm_ops', 'gin_trgm_ops', 'gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0008_vehicle_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='motorcycle',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0010_imagejob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='discount',
+            index=models.Index(fields=['vehicle_type', 'is_active', 'start_date', 'end_date'], name='discount_active_window_idx'),
+        ),
+    ]
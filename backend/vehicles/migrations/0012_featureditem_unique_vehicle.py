@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:56
+
+from django.db import migrations, models
+
+
+def remove_duplicate_featured(apps, schema_editor):
+    # Antes del índice único: se conserva el destacado más antiguo de cada vehículo
+    FeaturedItem = apps.get_model('vehicles', 'FeaturedItem')
+    for field in ('car', 'motorcycle'):
+        seen = set()
+        duplicates = []
+        rows = (
+            FeaturedItem.objects.filter(**{f'{field}__isnull': False})
+            .order_by(f'{field}_id', 'created_at', 'id')
+            .values_list('id', f'{field}_id')
+        )
+        for pk, vehicle_id in rows.iterator():
+            if vehicle_id in seen:
+                duplicates.append(pk)
+            seen.add(vehicle_id)
+        FeaturedItem.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0011_discount_active_window_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_featured, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='featureditem',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='featureditem',
+            constraint=models.UniqueConstraint(condition=models.Q(('car__isnull', False)), fields=('car',), name='featureditem_unique_car'),
+        ),
+        migrations.AddConstraint(
+            model_name='featureditem',
+            constraint=models.UniqueConstraint(condition=models.Q(('motorcycle__isnull', False)), fields=('motorcycle',), name='featureditem_unique_motorcycle'),
+        ),
+    ]
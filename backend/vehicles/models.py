@@ -1,5 +1,8 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models
 from django.contrib.auth.models import User
+from django.db.models.functions import Round
 from django.utils import timezone
 
 class Car(models.Model):
@@ -22,8 +25,35 @@ class Car(models.Model):
     fuel_type = models.CharField(max_length=50)
     image = models.ImageField(upload_to='cars/')
     created_at = models.DateTimeField(default=timezone.now)
+    # Validadores de los GET condicionales (conditional.py); update() y
+    # bulk_update() no lo tocan solos
+    updated_at = models.DateTimeField(auto_now=True)
     is_sold = models.BooleanField(default=False)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Mantenido por un trigger de la base de datos (migración 0008)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Tamaños reducidos JPEG/WebP de la imagen (vehicles/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    
+    class Meta:
+        indexes = [
+            # Soporta el orden por defecto y la paginación por cursor (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='car_created_at_id_idx'),
+            # Índices para los filtros del listado (vehicles/filters.py)
+            models.Index(fields=['brand'], name='car_brand_idx'),
+            models.Index(fields=['price'], name='car_price_idx'),
+            models.Index(fields=['year'], name='car_year_idx'),
+            models.Index(fields=['mileage'], name='car_mileage_idx'),
+            models.Index(fields=['fuel_type'], name='car_fuel_type_idx'),
+            models.Index(fields=['is_sold', 'transmission'], name='car_sold_transmission_idx'),
+            # Búsqueda de texto completo y búsqueda aproximada (vehicles/search.py)
+            GinIndex(fields=['search_vector'], name='car_search_vector_idx'),
+            GinIndex(
+                fields=['title', 'brand', 'model'],
+                opclasses=['gin_trgm_ops'] * 3,
+                name='car_trgm_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.brand} {self.model} ({self.year})"
@@ -49,8 +79,33 @@ class Motorcycle(models.Model):
     fuel_type = models.CharField(max_length=50)
     image = models.ImageField(upload_to='motorcycles/')
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
     is_sold = models.BooleanField(default=False)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Mantenido por un trigger de la base de datos (migración 0008)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Tamaños reducidos JPEG/WebP de la imagen (vehicles/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    
+    class Meta:
+        indexes = [
+            # Soporta el orden por defecto y la paginación por cursor (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='motorcycle_created_at_id_idx'),
+            # Índices para los filtros del listado (vehicles/filters.py)
+            models.Index(fields=['brand'], name='motorcycle_brand_idx'),
+            models.Index(fields=['price'], name='motorcycle_price_idx'),
+            models.Index(fields=['year'], name='motorcycle_year_idx'),
+            models.Index(fields=['mileage'], name='motorcycle_mileage_idx'),
+            models.Index(fields=['fuel_type'], name='motorcycle_fuel_type_idx'),
+            models.Index(fields=['is_sold', 'category'], name='motorcycle_sold_category_idx'),
+            # Búsqueda de texto completo y búsqueda aproximada (vehicles/search.py)
+            GinIndex(fields=['search_vector'], name='motorcycle_search_vector_idx'),
+            GinIndex(
+                fields=['title', 'brand', 'model'],
+                opclasses=['gin_trgm_ops'] * 3,
+                name='motorcycle_trgm_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.brand} {self.model} ({self.year})"
@@ -71,14 +126,31 @@ class FeaturedItem(models.Model):
     image_url = models.CharField(max_length=500, blank=True)
     
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     
     class Meta:
-        unique_together = ['car', 'motorcycle']
         ordering = ['-created_at']
+        constraints = [
+            # Un vehículo se destaca una sola vez. Índices únicos parciales
+            # porque un unique_together con la otra columna en NULL no
+            # impide duplicados; también sirven al NOT EXISTS de available-*.
+            models.UniqueConstraint(
+                fields=['car'], condition=models.Q(car__isnull=False), name='featureditem_unique_car',
+            ),
+            models.UniqueConstraint(
+                fields=['motorcycle'], condition=models.Q(motorcycle__isnull=False),
+                name='featureditem_unique_motorcycle',
+            ),
+        ]
     
     def save(self, *args, **kwargs):
+        self.fill_vehicle_fields()
+        super().save(*args, **kwargs)
+    
+    def fill_vehicle_fields(self):
         # Llenar automáticamente los campos title, price e image_url al guardar
+        # (también se usa antes de bulk_create, que no llama a save)
         if self.vehicle_type == 'car' and self.car:
             self.title = f"{self.car.brand} {self.car.model} ({self.car.year})"
             self.price = self.car.price
@@ -91,14 +163,33 @@ class FeaturedItem(models.Model):
             if self.motorcycle.image:
                 # Solo guardamos el path relativo, la URL completa se genera en el serializer
                 self.image_url = self.motorcycle.image.name
-        
-        super().save(*args, **kwargs)
     
     def __str__(self):
         if self.title:
             return f"Destacado: {self.title}"
         return "Destacado sin vehículo"
 
+class DiscountQuerySet(models.QuerySet):
+    def live(self, at=None):
+        # Activos y sin vencer, aunque todavía no hayan empezado
+        return self.filter(is_active=True, end_date__gt=at or timezone.now())
+    
+    def active(self, at=None):
+        # Vigentes en este momento
+        at = at or timezone.now()
+        return self.live(at).filter(start_date__lte=at)
+    
+    def expired(self, at=None):
+        return self.filter(is_active=True, end_date__lte=at or timezone.now())
+    
+    def with_new_price(self):
+        # Precio con descuento calculado en la base con aritmética decimal exacta
+        return self.annotate(new_price=Round(
+            models.F('original_price') * (100 - models.F('discount_percentage')) / 100,
+            2,
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        ))
+
 class Discount(models.Model):
     car = models.ForeignKey(Car, on_delete=models.CASCADE, null=True, blank=True)
     motorcycle = models.ForeignKey(Motorcycle, on_delete=models.CASCADE, null=True, blank=True)
@@ -113,14 +204,29 @@ class Discount(models.Model):
     image_url = models.CharField(max_length=500, blank=True)
     
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     is_active = models.BooleanField(default=True)
     
+    objects = DiscountQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Descuentos vigentes por tipo (DiscountQuerySet.active) y disponibilidad
+            models.Index(
+                fields=['vehicle_type', 'is_active', 'start_date', 'end_date'],
+                name='discount_active_window_idx',
+            ),
+        ]
     
     def save(self, *args, **kwargs):
+        self.fill_vehicle_fields()
+        super().save(*args, **kwargs)
+    
+    def fill_vehicle_fields(self):
         # Llenar automáticamente los campos title, original_price e image_url al guardar
+        # (también se usa antes de bulk_create, que no llama a save)
         if self.vehicle_type == 'car' and self.car:
             self.title = f"{self.car.brand} {self.car.model} ({self.car.year})"
             self.original_price = self.car.price
@@ -133,8 +239,6 @@ class Discount(models.Model):
             if self.motorcycle.image:
                 # Solo guardamos el path relativo, la URL completa se genera en el serializer
                 self.image_url = self.motorcycle.image.name
-        
-        super().save(*args, **kwargs)
     
     def __str__(self):
         vehicle_name = ""
@@ -156,10 +260,81 @@ class ContactMessage(models.Model):
     def __str__(self):
         return f"Mensaje de {self.name} - {self.date.strftime('%Y-%m-%d')}"
 
+class SubscriberQuerySet(models.QuerySet):
+    def subscribe(self, email, is_active=True):
+        """
+        Alta idempotente en una sola consulta (INSERT ... ON CONFLICT DO
+        NOTHING): un email repetido devuelve el suscriptor existente en vez
+        de fallar por la restricción unique. Devuelve (suscriptor, creado).
+        No dispara post_save.
+        """
+        self._for_write = True
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(self.model._meta.db_table)} (email, subscription_date, is_active) '
+                'VALUES (%s, %s, %s) ON CONFLICT (email) DO NOTHING RETURNING id, subscription_date',
+                [email, timezone.now(), is_active],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return self.get(email=email), False
+        fields = ['id', 'email', 'subscription_date', 'is_active']
+        return self.model.from_db(self.db, fields, [row[0], email, row[1], is_active]), True
+
 class Subscriber(models.Model):
     email = models.EmailField(unique=True)
     subscription_date = models.DateTimeField(default=timezone.now)
     is_active = models.BooleanField(default=True)
     
+    objects = SubscriberQuerySet.as_manager()
+    
+    @staticmethod
+    def normalize_email(email):
+        # Las altas y EmailBucketThrottle usan la misma clave: sin mayúsculas
+        return email.strip().lower()
+    
+    def __str__(self):
+        return self.email
+
+class ImageJob(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_RUNNING, 'En proceso'),
+        (STATUS_DONE, 'Terminado'),
+        (STATUS_FAILED, 'Fallido'),
+    ]
+    
+    car = models.ForeignKey(Car, on_delete=models.CASCADE, null=True, blank=True)
+    motorcycle = models.ForeignKey(Motorcycle, on_delete=models.CASCADE, null=True, blank=True)
+    vehicle_type = models.CharField(max_length=10, choices=FeaturedItem.VEHICLE_TYPE_CHOICES)
+    # Imagen a procesar; si el vehículo cambia de imagen el trabajo queda obsoleto
+    image_name = models.CharField(max_length=500)
+    
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Lo que consulta el worker para tomar el siguiente trabajo
+            models.Index(fields=['status', 'run_after'], name='imagejob_status_run_after_idx'),
+        ]
+    
+    @property
+    def vehicle(self):
+        return self.car if self.vehicle_type == 'car' else self.motorcycle
+    
     def __str__(self):
-        return self.email
\ No newline at end of file
+        return f"Imagen {self.image_name} ({self.get_status_display()})"
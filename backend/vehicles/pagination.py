@@ -0,0 +1,184 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import date, datetime
+
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre una clave compuesta, por defecto
+    (created_at, id). Es opcional: solo se activa cuando el cliente envía
+    ``cursor`` o ``page_size``; si no, la vista devuelve la lista completa
+    como hasta ahora.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = _('Invalid cursor')
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+        position, reverse = self.decode_cursor(request)
+
+        order_by = self.ordering
+        if reverse:
+            order_by = [self._invert(field) for field in order_by]
+
+        # Pedimos un elemento extra para saber si hay más páginas
+        queryset = self.get_page_queryset(queryset, position, reverse, order_by)
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_page_queryset(self, queryset, position, reverse, order_by):
+        queryset = queryset.order_by(*order_by)
+        if position is not None:
+            queryset = queryset.filter(self._keyset_filter(position, reverse))
+        return queryset
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, view):
+        return list(getattr(view, 'keyset_ordering', None) or self.ordering)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = payload['p']
+            reverse = bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': position}
+        if reverse:
+            payload['r'] = 1
+        encoded = b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        url = remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def _position(self, item):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            value = item[name] if isinstance(item, dict) else getattr(item, name)
+            if isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            elif value is not None and not isinstance(value, (int, str)):
+                value = str(value)
+            values.append(value)
+        return values
+
+    def _keyset_filter(self, position, reverse):
+        # (a, b) "después de" (x, y) == a > x OR (a = x AND b > y),
+        # respetando la dirección de cada campo del ordenamiento.
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+
+class UnionKeysetCursorPagination(KeysetCursorPagination):
+    """
+    Variante para listados que combinan varias tablas con UNION ALL. Recibe
+    una lista de querysets con la misma proyección (values()); el cursor se
+    aplica a cada uno antes de unirlos, ya que Django no permite filtrar
+    sobre el resultado de un UNION. Siempre pagina.
+    """
+
+    def is_requested(self, request):
+        return True
+
+    def get_page_queryset(self, querysets, position, reverse, order_by):
+        parts = [
+            super(UnionKeysetCursorPagination, self).get_page_queryset(
+                queryset, position, reverse, order_by
+            )[:self.page_size + 1]
+            for queryset in querysets
+        ]
+        if not parts:
+            return []
+        if len(parts) == 1:
+            return parts[0]
+        return parts[0].union(*parts[1:], all=True).order_by(*order_by)
@@ -0,0 +1,239 @@
+from operator import itemgetter
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.utils.encoding import iri_to_uri
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .images import build_srcset
+from .metrics import timer
+from .serializers import CarSerializer, MotorcycleSerializer, FeaturedItemSerializer, DiscountSerializer
+
+# Campos de DRF cuya representación es el valor tal como lo devuelve la base
+PLAIN_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+_fields_cache = {}
+
+
+def _serializer_fields(serializer_class):
+    # Los campos de DRF se construyen una vez por clase y se reutilizan
+    if serializer_class not in _fields_cache:
+        _fields_cache[serializer_class] = serializer_class().fields
+    return _fields_cache[serializer_class]
+
+
+class ValuesSerializer:
+    """
+    Reproduce la salida de ``serializer_class`` (mismas claves, orden y
+    formato) a partir de queryset.values(), sin instanciar modelos ni
+    recorrer los campos de DRF en cada fila. Solo para lectura.
+
+    Los SerializerMethodField se implementan como ``get_<campo>(row)`` igual
+    que en el serializer; ``method_lookups`` indica las columnas que lee cada
+    uno. Los campos declarados que no son del modelo (anotaciones) se
+    incluyen solo si el queryset los anota, como hace DRF al omitirlos.
+
+    ``fields``/``exclude`` limitan la salida, y con ella las columnas del
+    SELECT, a algunos campos; ``presets`` son listas de campos con nombre
+    (``fields=summary``).
+    """
+    serializer_class = None
+    method_lookups = {}
+    presets = {}
+
+    def __init__(self, context=None, fields=None, exclude=None):
+        self.context = context or {}
+        request = self.context.get('request')
+        # Esquema y host se resuelven una sola vez por petición
+        self.base_url = request.build_absolute_uri('/')[:-1] if request is not None else None
+        self.request = request
+        self.fields = fields
+        self.exclude = exclude
+        self.columns = None
+        # Imagen y variantes repiten nombres entre campos; storage.url() es lo caro
+        self._file_urls = {}
+
+    def project(self, queryset, required=()):
+        """
+        values() con las columnas de los campos elegidos. ``required`` son
+        columnas que necesita quien recorre las filas (p. ej. el cursor de
+        la paginación) aunque no formen parte de la salida.
+        """
+        columns = self._columns(_serializer_fields(self.serializer_class), queryset, '')
+        self.columns = self._select(columns)
+        lookups = [lookup for _, _, column_lookups in self.columns for lookup in column_lookups]
+        return queryset.values(*dict.fromkeys([*lookups, *required]))
+
+    def _select(self, columns):
+        names = [name for name, _, _ in columns]
+        fields = self.fields
+        if fields is not None and len(fields) == 1 and fields[0] in self.presets:
+            fields = self.presets[fields[0]]
+        unknown = [name for name in (fields or []) + (self.exclude or []) if name not in names]
+        if unknown:
+            raise serializers.ValidationError({'fields': [f'Campos desconocidos: {", ".join(unknown)}']})
+        if fields is not None:
+            columns = [column for column in columns if column[0] in fields]
+        if self.exclude:
+            columns = [column for column in columns if column[0] not in self.exclude]
+        if not columns:
+            raise serializers.ValidationError({'fields': ['No queda ningún campo para mostrar.']})
+        return columns
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        columns = [(name, getter) for name, getter, _ in self.columns]
+        with timer('serializer'):
+            return [{name: getter(row) for name, getter in columns} for row in rows]
+
+    def absolute_url(self, url):
+        if self.request is None:
+            return url
+        # Lo mismo que request.build_absolute_uri() para rutas absolutas
+        if url.startswith('/') and not url.startswith('//') and '/./' not in url and '/../' not in url:
+            return iri_to_uri(self.base_url + url)
+        return self.request.build_absolute_uri(url)
+
+    def file_url(self, name):
+        if not name:
+            return None
+        url = self._file_urls.get(name)
+        if url is None:
+            url = self._file_urls[name] = self.absolute_url(default_storage.url(name))
+        return url
+
+    def _columns(self, fields, queryset, prefix):
+        model = queryset.model if not prefix else None
+        annotations = queryset.query.annotations if not prefix else {}
+        columns = []
+        for name, field in fields.items():
+            if field.write_only:
+                continue
+            method = None if prefix else getattr(self, f'get_{name}', None)
+            if method is not None:
+                columns.append((name, method, self.method_lookups.get(name, ())))
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                raise ImproperlyConfigured(f'{type(self).__name__} necesita get_{name}()')
+            if field.source == '*' or '.' in field.source:
+                raise ImproperlyConfigured(f'{type(self).__name__}: campo "{name}" no soportado')
+
+            if model is not None and field.source not in annotations:
+                try:
+                    model._meta.get_field(field.source)
+                except FieldDoesNotExist:
+                    # DRF omite los campos de solo lectura que el objeto no tiene
+                    continue
+
+            lookup = f'{prefix}{field.source}'
+            if isinstance(field, serializers.BaseSerializer):
+                columns.append((name, *self._nested(field, lookup)))
+                continue
+            if isinstance(field, serializers.FileField):
+                getter = lambda row, lookup=lookup: self.file_url(row[lookup])
+            elif isinstance(field, PLAIN_FIELDS):
+                getter = itemgetter(lookup)
+            elif isinstance(field, serializers.RelatedField):
+                raise ImproperlyConfigured(f'{type(self).__name__}: relación "{name}" no soportada')
+            elif isinstance(field, serializers.DateTimeField):
+                getter = self._converted(lookup, self._datetime(field))
+            else:
+                getter = self._converted(lookup, field.to_representation)
+            columns.append((name, getter, (lookup,)))
+        return columns
+
+    def _nested(self, serializer, lookup):
+        if isinstance(serializer, serializers.ListSerializer):
+            raise ImproperlyConfigured(f'{type(self).__name__}: "{lookup}" es una lista')
+        pk_lookup = f'{lookup}__{serializer.Meta.model._meta.pk.name}'
+        columns = self._columns(serializer.fields, None, f'{lookup}__')
+        lookups = [pk_lookup] + [lookup for _, _, column_lookups in columns for lookup in column_lookups]
+
+        def nested(row):
+            if row[pk_lookup] is None:
+                return None
+            return {name: getter(row) for name, getter, _ in columns}
+        return nested, lookups
+
+    @staticmethod
+    def _datetime(field):
+        # DateTimeField.to_representation() con la zona horaria resuelta una vez
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+            return field.to_representation
+
+        def to_representation(value):
+            if not timezone.is_aware(value):
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return to_representation
+
+    @staticmethod
+    def _converted(lookup, convert):
+        def converted(row):
+            value = row[lookup]
+            return None if value is None else convert(value)
+        return converted
+
+
+class VehicleValuesSerializer(ValuesSerializer):
+    method_lookups = {'image_url': ('image',), 'image_srcset': ('image_variants',)}
+    presets = {
+        # Lo que necesita una tarjeta del listado
+        'summary': [
+            'id', 'title', 'brand', 'model', 'year', 'price', 'effective_price',
+            'discount_percentage', 'image_url', 'image_srcset', 'is_sold',
+        ],
+    }
+
+    def get_image_url(self, row):
+        return self.file_url(row['image'])
+
+    def get_image_srcset(self, row):
+        return build_srcset(row['image_variants'], self.absolute_url)
+
+
+class CarValuesSerializer(VehicleValuesSerializer):
+    serializer_class = CarSerializer
+
+
+class MotorcycleValuesSerializer(VehicleValuesSerializer):
+    serializer_class = MotorcycleSerializer
+
+
+class SnapshotValuesSerializer(ValuesSerializer):
+    # Destacados y descuentos: la imagen es el path copiado del vehículo
+    method_lookups = {'type': ('vehicle_type',), 'image_url': ('image_url',)}
+
+    def get_type(self, row):
+        return 'Auto' if row['vehicle_type'] == 'car' else 'Moto'
+
+    def get_image_url(self, row):
+        if row['image_url']:
+            return self.absolute_url('/media/' + row['image_url'])
+        return None
+
+
+class FeaturedItemValuesSerializer(SnapshotValuesSerializer):
+    serializer_class = FeaturedItemSerializer
+
+
+class DiscountValuesSerializer(SnapshotValuesSerializer):
+    # El queryset tiene que venir de DiscountQuerySet.with_new_price()
+    serializer_class = DiscountSerializer
+    method_lookups = {**SnapshotValuesSerializer.method_lookups, 'new_price': ('new_price',)}
+
+    def get_new_price(self, row):
+        return row['new_price']
@@ -0,0 +1,32 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fechas y dataclasses pasan por el encoder de DRF para conservar su formato
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+) if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer que codifica con orjson cuando está instalado. La salida es
+    byte a byte la de DRF (compacta, UTF-8 sin escapar, U+2028/U+2029
+    escapados); la versión indentada y lo que orjson no sabe codificar
+    siguen por el camino de DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # Por ejemplo enteros de más de 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        return content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
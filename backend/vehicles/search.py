@@ -0,0 +1,50 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+# Configuración de texto creada en la migración 0008: stemming en español
+# ignorando acentos ("camion" encuentra "camión").
+SEARCH_CONFIG = 'spanish_unaccent'
+
+# Campos cortos sobre los que se aplica la búsqueda aproximada (errores de tipeo)
+TRIGRAM_FIELDS = ('title', 'brand', 'model')
+
+
+def full_text_search(queryset, query):
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(search_vector=search_query).annotate(
+        score=SearchRank(F('search_vector'), search_query)
+    ).order_by('-score', '-created_at', '-id')
+
+
+def trigram_search(queryset, query):
+    similar = Q()
+    for field in TRIGRAM_FIELDS:
+        similar |= Q(**{f'{field}__trigram_word_similar': query})
+    return queryset.filter(similar).annotate(
+        score=Greatest(*[TrigramWordSimilarity(query, field) for field in TRIGRAM_FIELDS])
+    ).order_by('-score', '-created_at', '-id')
+
+
+def search_vehicles(querysets, query, limit):
+    """
+    Busca en cada queryset (autos, motos) y devuelve una única lista
+    ordenada por relevancia. Si la búsqueda de texto completo no encuentra
+    nada se recurre a la similitud por trigramas.
+    """
+    if not query:
+        results = []
+        for queryset in querysets:
+            results.extend(queryset.order_by('-created_at', '-id')[:limit])
+        results.sort(key=lambda vehicle: (vehicle.created_at, vehicle.id), reverse=True)
+        return results[:limit]
+
+    for strategy in (full_text_search, trigram_search):
+        results = []
+        for queryset in querysets:
+            results.extend(strategy(queryset, query)[:limit])
+        if results:
+            results.sort(key=lambda vehicle: (vehicle.score, vehicle.created_at), reverse=True)
+            return results[:limit]
+    return []
@@ -1,6 +1,12 @@
+from decimal import ROUND_HALF_UP, Decimal
+
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from django.contrib.auth.models import User
-from .models import Car, Motorcycle, ContactMessage, Subscriber, FeaturedItem, Discount
+from django.core.files.storage import default_storage
+from .images import build_srcset
+from .metrics import TimedSerializerMixin
+from .models import Car, Motorcycle, ContactMessage, Subscriber, FeaturedItem, Discount, ImageJob
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,13 +14,17 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'date_joined']
         read_only_fields = ['date_joined']
 
-class CarSerializer(serializers.ModelSerializer):
+class CarSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
     image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    # Solo presentes cuando la vista anota el queryset (discounts.with_effective_price)
+    effective_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    discount_percentage = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
     
     class Meta:
         model = Car
-        fields = '__all__'
+        exclude = ['search_vector', 'image_variants', 'updated_at']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -23,14 +33,22 @@ class CarSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.image.url)
             return obj.image.url
         return None
+    
+    def get_image_srcset(self, obj):
+        request = self.context.get('request')
+        return build_srcset(obj.image_variants, request.build_absolute_uri if request else str)
 
-class MotorcycleSerializer(serializers.ModelSerializer):
+class MotorcycleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
     image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    # Solo presentes cuando la vista anota el queryset (discounts.with_effective_price)
+    effective_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    discount_percentage = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
     
     class Meta:
         model = Motorcycle
-        fields = '__all__'
+        exclude = ['search_vector', 'image_variants', 'updated_at']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -39,8 +57,12 @@ class MotorcycleSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.image.url)
             return obj.image.url
         return None
+    
+    def get_image_srcset(self, obj):
+        request = self.context.get('request')
+        return build_srcset(obj.image_variants, request.build_absolute_uri if request else str)
 
-class FeaturedItemSerializer(serializers.ModelSerializer):
+class FeaturedItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     type = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
     
@@ -48,6 +70,19 @@ class FeaturedItemSerializer(serializers.ModelSerializer):
         model = FeaturedItem
         fields = ['id', 'car', 'motorcycle', 'vehicle_type', 'created_at', 'title', 'image_url', 'price', 'type']
     
+    def validate(self, data):
+        # Misma regla que los índices únicos parciales del modelo
+        for field in ('car', 'motorcycle'):
+            vehicle = data.get(field)
+            if vehicle is None:
+                continue
+            existing = FeaturedItem.objects.filter(**{field: vehicle})
+            if self.instance is not None:
+                existing = existing.exclude(pk=self.instance.pk)
+            if existing.exists():
+                raise serializers.ValidationError({field: 'Este vehículo ya está destacado.'})
+        return data
+    
     def get_type(self, obj):
         return 'Auto' if obj.vehicle_type == 'car' else 'Moto'
     
@@ -60,7 +95,7 @@ class FeaturedItemSerializer(serializers.ModelSerializer):
             return '/media/' + obj.image_url
         return None
 
-class DiscountSerializer(serializers.ModelSerializer):
+class DiscountSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     type = serializers.SerializerMethodField()
     new_price = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
@@ -75,9 +110,12 @@ class DiscountSerializer(serializers.ModelSerializer):
         return 'Auto' if obj.vehicle_type == 'car' else 'Moto'
     
     def get_new_price(self, obj):
+        # Las vistas lo traen calculado de la base (DiscountQuerySet.with_new_price)
+        if hasattr(obj, 'new_price'):
+            return obj.new_price
         if obj.original_price:
-            discount_decimal = float(obj.discount_percentage) / 100
-            return float(obj.original_price) * (1 - discount_decimal)
+            new_price = obj.original_price * (100 - obj.discount_percentage) / 100
+            return new_price.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
         return None
     
     def get_image_url(self, obj):
@@ -99,4 +137,103 @@ class SubscriberSerializer(serializers.ModelSerializer):
     class Meta:
         model = Subscriber
         fields = '__all__'
-        read_only_fields = ['subscription_date']
\ No newline at end of file
+        read_only_fields = ['subscription_date']
+        extra_kwargs = {'email': {'validators': [
+            UniqueValidator(queryset=Subscriber.objects.all(), lookup='iexact'),
+        ]}}
+    
+    def validate_email(self, value):
+        return Subscriber.normalize_email(value)
+
+class SubscriptionSerializer(SubscriberSerializer):
+    # Alta pública: un email repetido no es un error (ver SubscriberQuerySet.subscribe)
+    class Meta(SubscriberSerializer.Meta):
+        extra_kwargs = {'email': {'validators': []}}
+
+class ImageJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImageJob
+        fields = ['id', 'vehicle_type', 'car', 'motorcycle', 'image_name', 'status',
+                 'attempts', 'max_attempts', 'last_error', 'run_after', 'created_at', 'finished_at']
+        read_only_fields = fields
+
+class VehicleFeedSerializer(TimedSerializerMixin, serializers.Serializer):
+    # Representación común de autos y motos para /api/vehicles/ (ver feed.py)
+    id = serializers.IntegerField()
+    vehicle_type = serializers.CharField()
+    title = serializers.CharField()
+    brand = serializers.CharField()
+    model = serializers.CharField()
+    year = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    color = serializers.CharField()
+    mileage = serializers.IntegerField()
+    fuel_type = serializers.CharField()
+    transmission = serializers.CharField(source='feed_transmission', allow_null=True)
+    category = serializers.CharField(source='feed_category', allow_null=True)
+    created_at = serializers.DateTimeField()
+    is_sold = serializers.BooleanField()
+    effective_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    discount_percentage = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    
+    def get_image_url(self, obj):
+        if obj['image']:
+            url = default_storage.url(obj['image'])
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(url)
+            return url
+        return None
+    
+    def get_image_srcset(self, obj):
+        request = self.context.get('request')
+        return build_srcset(obj['image_variants'], request.build_absolute_uri if request else str)
+
+# Operaciones en lote (vehicles/batch.py)
+MAX_BATCH_SIZE = 500
+
+class BatchDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_BATCH_SIZE
+    )
+
+class BatchUpdateSerializer(serializers.Serializer):
+    # Los mismos cambios para todos los ids, o cambios distintos por elemento
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=MAX_BATCH_SIZE
+    )
+    changes = serializers.DictField(required=False, allow_empty=False)
+    items = serializers.ListField(
+        child=serializers.DictField(), required=False, allow_empty=False, max_length=MAX_BATCH_SIZE
+    )
+    
+    def validate(self, data):
+        if 'items' in data:
+            if 'ids' in data or 'changes' in data:
+                raise serializers.ValidationError('Envíe "items" o bien "ids" y "changes", no ambos.')
+            for item in data['items']:
+                if not isinstance(item.get('id'), int):
+                    raise serializers.ValidationError({'items': 'Cada elemento necesita un "id" entero.'})
+        elif 'ids' not in data or 'changes' not in data:
+            raise serializers.ValidationError('Envíe "items" o bien "ids" y "changes".')
+        return data
+
+class BatchVehiclesSerializer(serializers.Serializer):
+    cars = serializers.ListField(child=serializers.IntegerField(min_value=1), default=list)
+    motorcycles = serializers.ListField(child=serializers.IntegerField(min_value=1), default=list)
+    
+    def validate(self, data):
+        total = len(data['cars']) + len(data['motorcycles'])
+        if total == 0:
+            raise serializers.ValidationError('Envíe al menos un id en "cars" o "motorcycles".')
+        if total > MAX_BATCH_SIZE:
+            raise serializers.ValidationError(f'Máximo {MAX_BATCH_SIZE} vehículos por lote.')
+        return data
+
+class BatchDiscountSerializer(BatchVehiclesSerializer):
+    discount_percentage = serializers.DecimalField(max_digits=5, decimal_places=2)
+    start_date = serializers.DateTimeField()
+    end_date = serializers.DateTimeField()
+    is_active = serializers.BooleanField(default=True)
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .cache import (
+    NAMESPACE_CARS,
+    NAMESPACE_DISCOUNTS,
+    NAMESPACE_FEATURED,
+    NAMESPACE_MOTORCYCLES,
+    bump_generation,
+)
+from .images import needs_variants
+from .jobs import enqueue_image_job
+from .models import Car, Motorcycle, Subscriber, FeaturedItem, Discount
+from .snapshots import SNAPSHOT_SOURCE_FIELDS, sync_snapshots
+from .stats import invalidate_dashboard_stats
+
+CACHE_NAMESPACES = {
+    Car: NAMESPACE_CARS,
+    Motorcycle: NAMESPACE_MOTORCYCLES,
+    FeaturedItem: NAMESPACE_FEATURED,
+    Discount: NAMESPACE_DISCOUNTS,
+}
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+@receiver(post_save, sender=Motorcycle)
+@receiver(post_delete, sender=Motorcycle)
+@receiver(post_save, sender=Subscriber)
+@receiver(post_delete, sender=Subscriber)
+def invalidate_stats_on_write(sender, **kwargs):
+    invalidate_dashboard_stats()
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+@receiver(post_save, sender=Motorcycle)
+@receiver(post_delete, sender=Motorcycle)
+@receiver(post_save, sender=FeaturedItem)
+@receiver(post_delete, sender=FeaturedItem)
+@receiver(post_save, sender=Discount)
+@receiver(post_delete, sender=Discount)
+def invalidate_catalogue_cache_on_write(sender, **kwargs):
+    bump_generation(CACHE_NAMESPACES[sender])
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_save, sender=Motorcycle)
+def enqueue_image_processing(sender, instance, **kwargs):
+    # El procesamiento lo hace el worker (manage.py process_image_jobs)
+    # para que la subida no espere al redimensionado.
+    if needs_variants(instance):
+        enqueue_image_job(instance)
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_save, sender=Motorcycle)
+def sync_vehicle_snapshots(sender, instance, created, update_fields=None, **kwargs):
+    # Un vehículo nuevo no tiene destacados ni descuentos que actualizar
+    if created or (update_fields is not None and not SNAPSHOT_SOURCE_FIELDS.intersection(update_fields)):
+        return
+    sync_snapshots(sender, [instance.pk])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Solo en este proceso; los demás lo renuevan al vencer USER_CACHE_TTL
+    user_cache.invalidate(instance.pk)
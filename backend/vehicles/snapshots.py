@@ -0,0 +1,72 @@
+from django.db.models import CharField, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+
+from .cache import NAMESPACE_DISCOUNTS, NAMESPACE_FEATURED, bump_generation
+from .models import Car, Motorcycle, FeaturedItem, Discount
+
+# Destacados y descuentos guardan una copia de título, precio e imagen del
+# vehículo (ver fill_vehicle_fields) para listarse sin joins. Aquí se
+# mantienen al día con UPDATEs en lote cuando el vehículo cambia.
+
+# Campos del vehículo que se copian; guardar otros no requiere sincronizar
+SNAPSHOT_SOURCE_FIELDS = {'brand', 'model', 'year', 'price', 'image'}
+
+VEHICLE_FIELDS = {Car: 'car', Motorcycle: 'motorcycle'}
+
+# Modelo con copia -> (campo del precio, qué filas se sincronizan, namespace)
+SNAPSHOT_MODELS = {
+    FeaturedItem: ('price', Q(), NAMESPACE_FEATURED),
+    # Los descuentos inactivos conservan el precio que tenían, como registro
+    Discount: ('original_price', Q(is_active=True), NAMESPACE_DISCOUNTS),
+}
+
+
+def expected_values(vehicle_model, snapshot_model):
+    """Subconsultas con los valores que debería tener cada copia."""
+    field = VEHICLE_FIELDS[vehicle_model]
+    price_field = SNAPSHOT_MODELS[snapshot_model][0]
+    vehicle = vehicle_model.objects.filter(pk=OuterRef(f'{field}_id'))
+    # Mismo formato que fill_vehicle_fields: "Marca Modelo (Año)"
+    title = Concat(
+        'brand', Value(' '), 'model', Value(' ('), Cast('year', CharField()), Value(')'),
+        output_field=CharField(),
+    )
+    return {
+        'title': Subquery(vehicle.values(snapshot_title=title)[:1]),
+        price_field: Subquery(vehicle.values('price')[:1]),
+        'image_url': Subquery(vehicle.values('image')[:1]),
+    }
+
+
+def stale_snapshots(vehicle_model, snapshot_model, vehicle_ids=None):
+    """Copias que no coinciden con su vehículo."""
+    field = VEHICLE_FIELDS[vehicle_model]
+    scope = SNAPSHOT_MODELS[snapshot_model][1]
+    queryset = snapshot_model.objects.filter(scope, vehicle_type=field, **{f'{field}__isnull': False})
+    if vehicle_ids is not None:
+        queryset = queryset.filter(**{f'{field}_id__in': vehicle_ids})
+
+    expected = expected_values(vehicle_model, snapshot_model)
+    queryset = queryset.alias(**{f'expected_{name}': value for name, value in expected.items()})
+    drift = Q()
+    for name in expected:
+        drift |= ~Q(**{name: F(f'expected_{name}')}) | Q(**{f'{name}__isnull': True})
+    return queryset.filter(drift)
+
+
+def sync_snapshots(vehicle_model, vehicle_ids=None):
+    """
+    Corrige con un UPDATE por tabla las copias desactualizadas de los
+    vehículos indicados (o de todos). Devuelve {modelo: filas corregidas}.
+    """
+    updated = {}
+    for snapshot_model, (_, _, namespace) in SNAPSHOT_MODELS.items():
+        count = stale_snapshots(vehicle_model, snapshot_model, vehicle_ids).update(
+            **expected_values(vehicle_model, snapshot_model), updated_at=timezone.now()
+        )
+        if count:
+            # update() no envía post_save
+            bump_generation(namespace)
+        updated[snapshot_model] = count
+    return updated
@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.db.models import CharField, Count, Q, Value
+
+from .feed import car_feed_queryset, motorcycle_feed_queryset
+from .models import Car, Motorcycle, Subscriber
+
+STATS_CACHE_KEY = 'vehicles:dashboard-stats'
+STATS_CACHE_TIMEOUT = 60
+
+# Se guardan siempre los últimos MAX_RECENT de cada tipo; la vista recorta
+# según ?recent= para no tener una entrada de caché por cada valor.
+MAX_RECENT = 20
+
+
+def _counts():
+    # Un único UNION ALL con un agregado por tabla: (tipo, total, parcial)
+    cars = Car.objects.annotate(kind=Value('car', output_field=CharField())).values('kind').annotate(
+        total=Count('id'), partial=Count('id', filter=Q(is_sold=True))
+    )
+    motorcycles = Motorcycle.objects.annotate(kind=Value('motorcycle', output_field=CharField())).values('kind').annotate(
+        total=Count('id'), partial=Count('id', filter=Q(is_sold=True))
+    )
+    subscribers = Subscriber.objects.annotate(kind=Value('subscriber', output_field=CharField())).values('kind').annotate(
+        total=Count('id'), partial=Count('id', filter=Q(is_active=True))
+    )
+    return {row['kind']: row for row in cars.union(motorcycles, subscribers, all=True)}
+
+
+def _recent():
+    ordering = ('-created_at', '-id')
+    cars = car_feed_queryset().order_by(*ordering)[:MAX_RECENT]
+    motorcycles = motorcycle_feed_queryset().order_by(*ordering)[:MAX_RECENT]
+    rows = list(cars.union(motorcycles, all=True).order_by(*ordering))
+    return (
+        [row for row in rows if row['vehicle_type'] == 'car'],
+        [row for row in rows if row['vehicle_type'] == 'motorcycle'],
+    )
+
+
+def compute_dashboard_stats():
+    counts = _counts()
+    recent_cars, recent_motorcycles = _recent()
+    return {
+        'total_cars': counts['car']['total'],
+        'sold_cars': counts['car']['partial'],
+        'total_motorcycles': counts['motorcycle']['total'],
+        'sold_motorcycles': counts['motorcycle']['partial'],
+        'total_subscribers': counts['subscriber']['total'],
+        'active_subscribers': counts['subscriber']['partial'],
+        'recent_cars': recent_cars,
+        'recent_motorcycles': recent_motorcycles,
+    }
+
+
+def get_dashboard_stats():
+    return cache.get_or_set(STATS_CACHE_KEY, compute_dashboard_stats, STATS_CACHE_TIMEOUT)
+
+
+def invalidate_dashboard_stats():
+    cache.delete(STATS_CACHE_KEY)
@@ -0,0 +1,47 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_LENGTH = 12
+# nombre.<hash>.ext
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{%d}(?=\.[^./]+$|$)' % HASH_LENGTH)
+
+
+def strip_hash(name):
+    return HASHED_NAME_RE.sub('', name)
+
+
+def is_hashed(name):
+    return HASHED_NAME_RE.search(name) is not None
+
+
+@deconstructible(path='vehicles.storage.HashedFileSystemStorage')
+class HashedFileSystemStorage(FileSystemStorage):
+    """
+    Guarda cada archivo con un hash de su contenido en el nombre
+    (``cars/bmw.3f2a1b9c0d4e.jpg``). Un nombre nunca cambia de contenido, así
+    que /media/ puede servirse con caché "immutable"; subir dos veces el
+    mismo archivo reutiliza el existente.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        root, extension = os.path.splitext(strip_hash(name))
+        return f'{root}.{digest.hexdigest()[:HASH_LENGTH]}{extension}'
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
@@ -1,3 +1,1033 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.mixins import ListModelMixin
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import benchmark
+from .authentication import ClaimsUser, model_user, user_cache
+from .batch import BatchConflict, _batch_create
+from .cache import get_timeout
+from .discounts import discount_window_marker
+from .imports import ImageArchive, import_inventory, read_rows
+from .jobs import STALE_AFTER, claim_next_job, process_pending_jobs, run_job
+from .media import IMMUTABLE_MAX_AGE
+from .metrics import reset_metrics
+from .models import Car, Motorcycle, ContactMessage, FeaturedItem, Discount, ImageJob, Subscriber
+from .projections import CarValuesSerializer
+from .renderers import FastJSONRenderer
+from .serializers import SubscriberSerializer
+from .snapshots import stale_snapshots, sync_snapshots
+from .throttling import reset_buckets
+from .views import ValuesListMixin
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def create_car(user, **kwargs):
+    data = {
+        'title': 'Toyota Corolla', 'description': 'Auto familiar', 'price': 15000,
+        'brand': 'Toyota', 'model': 'Corolla', 'year': 2020, 'color': 'Rojo',
+        'engine': '1.8', 'transmission': 'automatic', 'mileage': 10000,
+        'fuel_type': 'Gasolina', 'image': 'cars/BMW.jpg', 'created_by': user,
+    }
+    data.update(kwargs)
+    return Car.objects.create(**data)
+
+
+def create_motorcycle(user, **kwargs):
+    data = {
+        'title': 'Yamaha R1', 'description': 'Moto deportiva', 'price': 9000,
+        'brand': 'Yamaha', 'model': 'R1', 'year': 2021, 'color': 'Azul',
+        'engine': '1000cc', 'category': 'combustion', 'mileage': 5000,
+        'fuel_type': 'Gasolina', 'image': 'motorcycles/Yamaha.jpg', 'created_by': user,
+    }
+    data.update(kwargs)
+    return Motorcycle.objects.create(**data)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class QueryCountTests(TestCase):
+    """
+    La cantidad de consultas de cada endpoint no debe crecer con la cantidad
+    de filas (N+1). Cada vehículo se crea con un usuario distinto para que
+    un created_by sin select_related se note.
+    """
+    list_endpoints = [
+        '/api/cars/',
+        '/api/motorcycles/',
+        '/api/search/?q=',
+        '/api/search/?q=toyota&type=cars',
+        '/api/search/?q=yamaha&type=motorcycles',
+        '/api/vehicles/',
+        '/api/featured/',
+        '/api/discounts/',
+        '/api/discounts/active/',
+        '/api/available-cars/',
+        '/api/available-motorcycles/',
+        '/api/available-cars-discount/',
+        '/api/available-motorcycles-discount/',
+        '/api/stats/',
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in ('cars/BMW.jpg', 'motorcycles/Yamaha.jpg'):
+            path = os.path.join(MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            Image.new('RGB', (400, 300), 'red').save(path, 'JPEG')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user('admin', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def add_rows(self, count):
+        start = Car.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create_user(f'dealer{i}')
+            car = create_car(user)
+            motorcycle = create_motorcycle(user)
+            # Solo la mitad queda destacada o con descuento, así los
+            # endpoints "available" también tienen filas que devolver.
+            if i % 2:
+                FeaturedItem.objects.create(vehicle_type='car', car=car, created_by=user)
+                Discount.objects.create(
+                    vehicle_type='motorcycle', motorcycle=motorcycle, discount_percentage=10,
+                    start_date=timezone.now(), end_date=timezone.now() + timedelta(days=7),
+                    created_by=user,
+                )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(context.captured_queries)
+
+    def test_list_endpoints_do_not_grow_with_rows(self):
+        self.add_rows(2)
+        few = {url: self.count_queries(url) for url in self.list_endpoints}
+        self.add_rows(8)
+        for url in self.list_endpoints:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), few[url])
+
+    def test_detail_endpoints_query_count(self):
+        self.add_rows(1)
+        car = Car.objects.first()
+        motorcycle = Motorcycle.objects.first()
+        self.client.force_authenticate(None)
+        # El estado de los descuentos se consulta una vez y queda en caché
+        discount_window_marker()
+        for url in [f'/api/cars/{car.pk}/', f'/api/motorcycles/{motorcycle.pk}/']:
+            with self.subTest(url=url):
+                # El agregado de los validadores (conditional.py) y la fila
+                self.assertEqual(self.count_queries(url), 2)
+
+    def test_paginated_lists_do_not_grow_with_rows(self):
+        self.add_rows(2)
+        few = self.count_queries('/api/cars/?page_size=5')
+        self.add_rows(8)
+        self.assertEqual(self.count_queries('/api/cars/?page_size=5'), few)
+
+
+class DiscountQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('admin')
+        self.car = create_car(self.user, price='19999.99')
+        self.now = timezone.now()
+
+    def create_discount(self, start, end, percentage='12.50'):
+        return Discount.objects.create(
+            vehicle_type='car', car=self.car, discount_percentage=percentage,
+            start_date=self.now + start, end_date=self.now + end, created_by=self.user,
+        )
+
+    def test_active_window(self):
+        current = self.create_discount(timedelta(days=-1), timedelta(days=1))
+        self.create_discount(timedelta(days=-3), timedelta(days=-1))
+        upcoming = self.create_discount(timedelta(days=1), timedelta(days=3))
+
+        self.assertEqual(list(Discount.objects.active(self.now)), [current])
+        self.assertCountEqual(Discount.objects.live(self.now), [current, upcoming])
+
+    def test_new_price_is_exact(self):
+        self.create_discount(timedelta(days=-1), timedelta(days=1))
+        discount = Discount.objects.with_new_price().get()
+        # 19999.99 * 0.875 = 17499.99125 -> 17499.99, sin errores de float
+        self.assertEqual(str(discount.new_price), '17499.99')
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        reset_metrics()
+        self.client = APIClient()
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_metrics_are_grouped_by_route(self):
+        user = User.objects.create_user('admin')
+        car = create_car(user)
+        self.client.get(f'/api/cars/{car.pk}/')
+
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        labels = 'view="api/cars/<int:pk>/",method="GET"'
+        self.assertIn(f'vehicles_requests_total{{{labels},status="200"}} 1', body)
+        self.assertIn(f'vehicles_db_queries_count{{{labels}}} 1', body)
+        self.assertIn(f'vehicles_phase_duration_seconds_count{{{labels},phase="serializer"}} 1', body)
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_and_clear(self):
+        created = benchmark.seed(cars=20, motorcycles=10, discounts=5, featured=3, subscribers=4)
+        self.assertEqual(created, {Car: 20, Motorcycle: 10, Discount: 5, FeaturedItem: 3, Subscriber: 4})
+        self.assertEqual(Discount.objects.filter(title='').count(), 0)
+
+        summary = benchmark.run_scenario(
+            benchmark.ClientRunner(), benchmark.SCENARIOS['detail'], benchmark.scenario_context(),
+            requests=5, warmup=1,
+        )
+        self.assertEqual(summary['errors'], 0)
+        self.assertEqual(summary['queries'], 2)
+
+        benchmark.clear()
+        self.assertFalse(Car.objects.exists())
+        self.assertFalse(Subscriber.objects.exists())
+
+
+class ValuesSerializerTests(TestCase):
+    def setUp(self):
+        benchmark.seed(cars=12, motorcycles=8, discounts=6, featured=4, subscribers=0)
+        car = Car.objects.first()
+        car.title = 'Peugeot 208 “Allure” — ñandú  '
+        car.image_variants = {'webp': {'320': 'cars/auto ñ.320.webp', '640': 'cars/auto ñ.640.webp'}}
+        car.save()
+        Car.objects.filter(pk=Car.objects.last().pk).update(image='')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(username=benchmark.BENCHMARK_USERNAME))
+
+    def test_same_bytes_as_drf(self):
+        urls = [
+            '/api/cars/', '/api/cars/?page_size=5&ordering=-effective_price', '/api/motorcycles/',
+            '/api/featured/', '/api/discounts/', '/api/discounts/active/', '/api/available-cars/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                fast = self.client.get(url)
+                cache.clear()
+                with mock.patch.object(ValuesListMixin, 'list', ListModelMixin.list), \
+                        mock.patch.object(FastJSONRenderer, 'render', JSONRenderer.render):
+                    drf = self.client.get(url)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, drf.content)
+
+    def test_sparse_fieldsets(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/cars/?fields=summary&page_size=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.data['results'][0]),
+            set(CarValuesSerializer.presets['summary']),
+        )
+        self.assertNotIn('description', queries.captured_queries[-1]['sql'])
+
+        response = self.client.get('/api/cars/?exclude=description,created_by')
+        self.assertNotIn('description', response.data[0])
+        self.assertIn('mileage', response.data[0])
+        self.assertEqual(self.client.get('/api/cars/?fields=id,nope').status_code, 400)
+
+
+class CompressionTests(TestCase):
+    def test_gzip_with_conditional_get(self):
+        user = User.objects.create_user('admin')
+        for number in range(30):
+            create_car(user, title=f'Auto {number}')
+        client = APIClient()
+        plain = client.get('/api/cars/')
+        response = client.get('/api/cars/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertTrue(response['ETag'].startswith('W/'))
+
+        # El ETag débil sigue validando la respuesta
+        response = client.get('/api/cars/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = client.get('/api/cars/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_html_is_never_compressed(self):
+        user = User.objects.create_user('admin')
+        for number in range(30):
+            create_car(user, title=f'Auto {number}')
+        client = APIClient()
+        # API navegable y admin: HTML con el token CSRF (BREACH)
+        for url, accept in [('/api/cars/', 'text/html'), ('/admin/login/', '*/*')]:
+            with self.subTest(url=url):
+                response = client.get(url, HTTP_ACCEPT=accept, HTTP_ACCEPT_ENCODING='gzip')
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(len(response.content), 1024)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user('admin', password='clave-segura', is_staff=True)
+
+    def test_authenticated_request_without_user_query(self):
+        client = APIClient()
+        response = client.post('/api/token/', {'username': 'admin', 'password': 'clave-segura'}, format='json')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if 'auth_user' in query['sql']])
+
+        # El usuario completo sale del LRU y se descarta al modificarlo
+        token_user = response.wsgi_request.user
+        self.assertIsInstance(token_user, ClaimsUser)
+        self.assertTrue(token_user.is_staff)
+        self.assertEqual(model_user(token_user), self.user)
+        with self.assertNumQueries(0):
+            user_cache.get(self.user.pk)
+        self.user.save()
+        with self.assertNumQueries(1):
+            user_cache.get(self.user.pk)
+
+
+class PublicWriteTests(TestCase):
+    def setUp(self):
+        reset_buckets()
+
+    def test_subscribe_is_idempotent(self):
+        client = APIClient()
+        response = client.post('/api/subscribers/', {'email': 'ana@Example.com'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['email'], 'ana@example.com')
+        with self.assertNumQueries(2):
+            again = client.post('/api/subscribers/', {'email': 'ana@example.com'}, format='json')
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.data['id'], response.data['id'])
+        self.assertEqual(Subscriber.objects.count(), 1)
+
+    def test_subscriber_email_ignores_case(self):
+        # Misma clave que EmailBucketThrottle: el alta no duplica lo que la cubeta junta
+        client = APIClient()
+        response = client.post('/api/subscribers/', {'email': ' Ana@Example.com'}, format='json')
+        again = client.post('/api/subscribers/', {'email': 'ana@example.com'}, format='json')
+        self.assertEqual(again.data['id'], response.data['id'])
+        self.assertEqual(Subscriber.objects.get().email, 'ana@example.com')
+        serializer = SubscriberSerializer(data={'email': 'ANA@example.com'})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('email', serializer.errors)
+
+    def test_contact_burst_is_throttled(self):
+        client = APIClient()
+        data = {'name': 'Ana', 'phone': '555', 'message': 'Hola'}
+        statuses = [
+            client.post('/api/contact-messages/', {**data, 'email': f'ana{number}@example.com'}, format='json').status_code
+            for number in range(6)
+        ]
+        self.assertEqual(statuses, [201] * 5 + [429])
+        # La misma dirección desde otra IP también tiene su límite
+        other = APIClient(REMOTE_ADDR='10.0.0.2')
+        statuses = [
+            other.post('/api/contact-messages/', {**data, 'email': 'bot@example.com'}, format='json').status_code
+            for _ in range(4)
+        ]
+        self.assertEqual(statuses, [201] * 3 + [429])
+        self.assertEqual(ContactMessage.objects.count(), 8)
+
+    def test_forwarded_for_is_not_trusted_without_proxies(self):
+        client = APIClient()
+        data = {'name': 'Ana', 'phone': '555', 'message': 'Hola'}
+        statuses = [
+            client.post(
+                '/api/contact-messages/', {**data, 'email': f'ana{number}@example.com'}, format='json',
+                HTTP_X_FORWARDED_FOR=f'203.0.113.{number}',
+            ).status_code
+            for number in range(6)
+        ]
+        self.assertEqual(statuses, [201] * 5 + [429])
+
+
+class CatalogueCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.car = create_car(User.objects.create_user('admin'))
+
+    def test_write_in_this_process_invalidates(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/search/?q=')['X-Cache'], 'MISS')
+        self.assertEqual(client.get('/api/search/?q=')['X-Cache'], 'HIT')
+        self.car.title = 'Renault Clio'
+        self.car.save()
+        response = client.get('/api/search/?q=')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data[0]['title'], 'Renault Clio')
+
+    def test_out_of_process_write_expires_with_local_timeout(self):
+        # Otro proceso (worker, comandos) no cambia la generación de esta caché
+        client = APIClient()
+        client.get('/api/search/?q=')
+        Car.objects.filter(pk=self.car.pk).update(title='Renault Clio')
+        self.assertEqual(client.get('/api/search/?q=')['X-Cache'], 'HIT')
+        later = time.time() + get_timeout() + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            response = client.get('/api/search/?q=')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data[0]['title'], 'Renault Clio')
+
+    def test_timeout(self):
+        with self.settings(CATALOGUE_CACHE_TIMEOUT=300, CATALOGUE_LOCAL_CACHE_TIMEOUT=30):
+            self.assertEqual(get_timeout(), 30)
+            with mock.patch('vehicles.cache.is_shared_cache', return_value=True):
+                self.assertEqual(get_timeout(), 300)
+
+    def test_out_of_process_write_with_validators(self):
+        # Con ConditionalGetMixin el ETag de la base forma parte de la clave
+        client = APIClient()
+        url = f'/api/cars/{self.car.pk}/'
+        client.get(url)
+        self.assertEqual(client.get(url)['X-Cache'], 'HIT')
+        Car.objects.filter(pk=self.car.pk).update(title='Renault Clio', updated_at=timezone.now())
+        response = client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Renault Clio')
+
+    def test_validators_follow_database_writes(self):
+        # Escrituras sin señales ni caché en común, como las de otro proceso
+        client = APIClient()
+        url = f'/api/cars/{self.car.pk}/'
+        etag = client.get(url)['ETag']
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Car.objects.filter(pk=self.car.pk).update(title='Renault Clio', updated_at=timezone.now())
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Renault Clio')
+
+        # Los descuentos forman parte del ETag de autos y motos
+        etag = client.get('/api/cars/')['ETag']
+        self.assertEqual(client.get('/api/cars/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Discount.objects.bulk_create([Discount(
+            vehicle_type='car', car=self.car, discount_percentage=10, created_by=self.car.created_by,
+            start_date=timezone.now() + timedelta(days=1), end_date=timezone.now() + timedelta(days=7),
+        )])
+        self.assertEqual(client.get('/api/cars/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageJobTests(TestCase):
+    def setUp(self):
+        # El post_save del auto encola el trabajo
+        self.car = create_car(User.objects.create_user('admin'))
+        self.job = ImageJob.objects.get(car=self.car)
+
+    def test_retries_then_fails(self):
+        with mock.patch('vehicles.jobs.process_instance_image', side_effect=ValueError('imagen rota')), \
+                self.assertLogs('vehicles.jobs', 'WARNING'):
+            for attempt in range(1, self.job.max_attempts + 1):
+                job = claim_next_job()
+                self.assertEqual((job.pk, job.status, job.attempts), (self.job.pk, ImageJob.STATUS_RUNNING, attempt))
+                run_job(job)
+                # Sin esperar el retraso del reintento
+                ImageJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = ImageJob.objects.get(pk=self.job.pk)
+        self.assertEqual(job.status, ImageJob.STATUS_FAILED)
+        self.assertIn('ValueError: imagen rota', job.last_error)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(claim_next_job())
+
+    def test_retry_is_delayed(self):
+        with mock.patch('vehicles.jobs.process_instance_image', side_effect=OSError('sin archivo')), \
+                self.assertLogs('vehicles.jobs', 'WARNING'):
+            run_job(claim_next_job())
+        job = ImageJob.objects.get(pk=self.job.pk)
+        self.assertEqual(job.status, ImageJob.STATUS_PENDING)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIsNone(claim_next_job())
+
+    def test_stale_running_job_is_reclaimed_until_attempts_run_out(self):
+        stale = timezone.now() - STALE_AFTER - timedelta(minutes=1)
+        ImageJob.objects.filter(pk=self.job.pk).update(status=ImageJob.STATUS_RUNNING, locked_at=stale, attempts=1)
+        job = claim_next_job()
+        self.assertEqual((job.pk, job.attempts), (self.job.pk, 2))
+
+        ImageJob.objects.filter(pk=self.job.pk).update(locked_at=stale, attempts=self.job.max_attempts)
+        self.assertIsNone(claim_next_job())
+        self.assertEqual(ImageJob.objects.get(pk=self.job.pk).status, ImageJob.STATUS_FAILED)
+
+    def test_worker_updates_are_served_by_the_api(self):
+        path = os.path.join(MEDIA_ROOT, 'cars', 'BMW.jpg')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.new('RGB', (800, 600), 'red').save(path, 'JPEG')
+        cache.clear()
+        client = APIClient()
+        client.get('/api/cars/')
+        self.assertEqual(client.get('/api/cars/')['X-Cache'], 'HIT')
+        self.assertEqual(process_pending_jobs(), 1)
+        self.assertEqual(ImageJob.objects.get(pk=self.job.pk).status, ImageJob.STATUS_DONE)
+        # Las variantes cambian updated_at y con él el ETag de la clave
+        response = client.get('/api/cars/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIsNotNone(response.data[0]['image_srcset'])
+
+
+class VehicleFeedTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('admin')
+        now = timezone.now()
+        # Autos y motos intercalados en el tiempo
+        self.expected = []
+        for days, create in enumerate([create_motorcycle, create_car, create_motorcycle, create_car]):
+            vehicle = create(user, created_at=now - timedelta(days=days))
+            self.expected.append((vehicle._meta.model_name, vehicle.pk))
+        self.client = APIClient()
+
+    def feed(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        return [(item['vehicle_type'], item['id']) for item in results], response
+
+    def test_merges_types_by_created_at(self):
+        self.assertEqual(self.feed('/api/vehicles/')[0], self.expected)
+
+        page, response = self.feed('/api/vehicles/?page_size=3')
+        self.assertEqual(page, self.expected[:3])
+        self.assertEqual(self.feed(response.data['next'])[0], self.expected[3:])
+
+    def test_type_filters(self):
+        cars = [item for item in self.expected if item[0] == 'car']
+        motorcycles = [item for item in self.expected if item[0] == 'motorcycle']
+        self.assertEqual(self.feed('/api/vehicles/?type=cars')[0], cars)
+        self.assertEqual(self.feed('/api/vehicles/?transmission=automatic')[0], cars)
+        self.assertEqual(self.feed('/api/vehicles/?category=combustion')[0], motorcycles)
+        # Un filtro vacío no cuenta como filtro propio de un tipo
+        self.assertEqual(self.feed('/api/vehicles/?transmission=&category=')[0], self.expected)
+
+
+def jpeg_bytes(size=(400, 300)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'blue').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class InventoryImportTests(TestCase):
+    csv = (
+        'title,description,price,brand,model,year,color,engine,transmission,mileage,fuel_type,image\n'
+        'Fiat Uno,Usado,5000,Fiat,Uno,2010,Blanco,1.3,manual,90000,Nafta,fotos/uno.jpg\n'
+        'Fiat Palio,Usado,6000,Fiat,Palio,dos mil,Gris,1.4,manual,80000,Nafta,palio.jpg\n'
+        'Ford Ka,Usado,7000,Ford,Ka,2015,Rojo,1.5,semi,50000,Nafta,\n'
+        'VW Gol,Usado,8000,VW,Gol,2018,Negro,1.6,manual,40000,Nafta,uno.jpg\n'
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user('admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            zip_file.writestr('fotos/uno.jpg', jpeg_bytes())
+        self.archive = archive.getvalue()
+
+    def upload(self, query=''):
+        return self.client.post(f'/api/import/cars/{query}', {
+            'file': SimpleUploadedFile('autos.csv', self.csv.encode(), content_type='text/csv'),
+            'images': SimpleUploadedFile('fotos.zip', self.archive, content_type='application/zip'),
+        }, format='multipart')
+
+    def test_valid_rows_are_created_and_bad_rows_reported(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {key: response.data[key] for key in ('total', 'valid', 'created')},
+            {'total': 4, 'valid': 2, 'created': 2},
+        )
+        errors = {error['row']: set(error['errors']) for error in response.data['errors']}
+        # Imagen fuera del ZIP, año inválido y transmisión inválida sin imagen
+        self.assertEqual(errors, {2: {'image'}, 3: {'transmission', 'image'}})
+        self.assertCountEqual(Car.objects.values_list('title', flat=True), ['Fiat Uno', 'VW Gol'])
+        # bulk_create no dispara post_save: las imágenes se encolan a mano
+        self.assertEqual(ImageJob.objects.count(), 2)
+
+    def test_dry_run_only_validates(self):
+        response = self.upload('?dry_run=1')
+        self.assertEqual((response.data['valid'], response.data['created']), (2, 0))
+        self.assertFalse(Car.objects.exists())
+
+    def test_failed_batch_deletes_stored_images(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            zip_file.writestr('nueva.jpg', jpeg_bytes((320, 240)))
+            zip_file.writestr('usada.jpg', jpeg_bytes((321, 240)))
+        # Otro auto ya usa el mismo contenido: el storage comparte el archivo
+        used = create_car(self.user, image=SimpleUploadedFile('usada.jpg', jpeg_bytes((321, 240))))
+        row = read_rows(io.BytesIO(self.csv.encode()), 'csv')[0]
+        rows = [{**row, 'image': 'nueva.jpg'}, {**row, 'image': 'usada.jpg'}]
+        with mock.patch('vehicles.imports.enqueue_image_jobs', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                import_inventory(Car, rows, self.user, images=ImageArchive(io.BytesIO(archive.getvalue())))
+        self.assertEqual(list(Car.objects.all()), [used])
+        stored = os.listdir(os.path.join(MEDIA_ROOT, 'cars'))
+        self.assertIn(os.path.basename(used.image.name), stored)
+        self.assertFalse([name for name in stored if name.startswith('nueva.')])
+
+    def test_unreadable_file(self):
+        response = self.client.post('/api/import/cars/', {
+            'file': SimpleUploadedFile('autos.txt', b'nada'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+    def test_command(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        paths = {'csv': os.path.join(directory, 'autos.csv'), 'zip': os.path.join(directory, 'fotos.zip')}
+        with open(paths['csv'], 'w') as file:
+            file.write(self.csv)
+        with open(paths['zip'], 'wb') as file:
+            file.write(self.archive)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command(
+            'import_inventory', 'cars', paths['csv'], images=paths['zip'], user='admin',
+            stdout=stdout, stderr=stderr,
+        )
+        self.assertIn('4 filas, 2 válidas, 2 creadas, 2 con error', stdout.getvalue())
+        self.assertIn('Fila 2', stderr.getvalue())
+        self.assertEqual(Car.objects.count(), 2)
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('admin')
+        self.cars = [create_car(self.user, title=f'Auto {number}', price=1000 * (number + 1)) for number in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, url, data):
+        return self.client.post(url, data, format='json')
+
+    def statuses(self, response):
+        return [(result['id'], result['status']) for result in response.data['results']]
+
+    def test_update_same_changes(self):
+        featured = FeaturedItem.objects.create(vehicle_type='car', car=self.cars[0], created_by=self.user)
+        ids = [self.cars[0].pk, self.cars[1].pk, 999999]
+        response = self.post('/api/batch/cars/update/', {'ids': ids, 'changes': {'price': '500.00'}})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(self.statuses(response), list(zip(ids, ['updated', 'updated', 'not_found'])))
+        self.assertEqual(sorted(Car.objects.values_list('price', flat=True)), [500, 500, 3000])
+        # La copia del destacado sigue al vehículo
+        featured.refresh_from_db()
+        self.assertEqual(featured.price, 500)
+
+    def test_update_items(self):
+        response = self.post('/api/batch/cars/update/', {'items': [
+            {'id': self.cars[0].pk, 'mileage': 1},
+            {'id': self.cars[1].pk, 'year': 'nunca'},
+            {'id': self.cars[2].pk, 'image': 'otra.jpg'},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.data['results']], ['updated', 'invalid', 'invalid'])
+        self.assertIn('image', response.data['results'][2]['errors'])
+        self.assertEqual(Car.objects.get(pk=self.cars[0].pk).mileage, 1)
+
+    def test_read_only_fields_are_rejected(self):
+        featured = FeaturedItem.objects.create(vehicle_type='car', car=self.cars[0], created_by=self.user)
+        for url, changes in [
+            ('/api/batch/cars/update/', {'created_by': self.user.pk}),
+            ('/api/batch/featured/update/', {'price': '1.00'}),
+            ('/api/batch/featured/update/', {'title': 'Otro'}),
+            ('/api/batch/discounts/update/', {'original_price': '1.00'}),
+        ]:
+            with self.subTest(url=url, changes=changes):
+                response = self.post(url, {'ids': [featured.pk], 'changes': changes})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(changes)), response.data['changes'])
+        featured.refresh_from_db()
+        self.assertEqual(featured.price, self.cars[0].price)
+
+    def test_delete(self):
+        ids = [self.cars[0].pk, 999999]
+        response = self.post('/api/batch/cars/delete/', {'ids': ids})
+        self.assertEqual(response.data['deleted'], 1)
+        self.assertEqual(self.statuses(response), list(zip(ids, ['deleted', 'not_found'])))
+        self.assertFalse(Car.objects.filter(pk=self.cars[0].pk).exists())
+
+    def test_create_featured_and_discounts(self):
+        FeaturedItem.objects.create(vehicle_type='car', car=self.cars[0], created_by=self.user)
+        ids = [self.cars[0].pk, self.cars[1].pk, 999999]
+        response = self.post('/api/batch/featured/create/', {'cars': ids})
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(self.statuses(response), list(zip(ids, ['exists', 'created', 'not_found'])))
+        self.assertEqual(FeaturedItem.objects.get(pk=response.data['results'][1]['created_id']).title, 'Toyota Corolla (2020)')
+
+        now = timezone.now()
+        response = self.post('/api/batch/discounts/create/', {
+            'cars': [self.cars[2].pk], 'discount_percentage': '10',
+            'start_date': now.isoformat(), 'end_date': (now + timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(Discount.objects.get().original_price, 3000)
+
+    def test_concurrent_create_is_a_conflict(self):
+        FeaturedItem.objects.create(vehicle_type='car', car=self.cars[0], created_by=self.user)
+        # Otra petición lo destacó después de la comprobación: el índice único lo rechaza
+        with self.assertRaises(BatchConflict):
+            _batch_create(
+                FeaturedItem, self.user, {'car': [self.cars[0].pk, self.cars[1].pk], 'motorcycle': []},
+                FeaturedItem.objects.none(),
+            )
+        self.assertEqual(FeaturedItem.objects.count(), 1)
+
+    def test_create_locks_vehicle_rows(self):
+        # Discount no tiene índice único: dos lotes concurrentes se ordenan
+        # con el bloqueo de los vehículos
+        now = timezone.now()
+        with CaptureQueriesContext(connection) as queries:
+            _batch_create(
+                Discount, self.user, {'car': [self.cars[0].pk], 'motorcycle': []}, Discount.objects.live(),
+                discount_percentage=10, start_date=now, end_date=now + timedelta(days=1),
+            )
+        car_table = Car._meta.db_table
+        self.assertTrue(any(
+            car_table in query['sql'] and 'FOR UPDATE' in query['sql'] for query in queries.captured_queries
+        ))
+        self.assertEqual(Discount.objects.count(), 1)
+
+
+class AvailableVehiclesTests(TestCase):
+    def test_excludes_featured_and_live_discounts(self):
+        user = User.objects.create_user('admin')
+        featured, discounted, expired, free = [create_car(user) for _ in range(4)]
+        FeaturedItem.objects.create(vehicle_type='car', car=featured, created_by=user)
+        now = timezone.now()
+        for car, end in [(discounted, now + timedelta(days=1)), (expired, now - timedelta(days=1))]:
+            Discount.objects.create(
+                vehicle_type='car', car=car, discount_percentage=10,
+                start_date=now - timedelta(days=2), end_date=end, created_by=user,
+            )
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/available-cars/')
+        self.assertEqual({car['id'] for car in response.data}, {discounted.pk, expired.pk, free.pk})
+        response = client.get('/api/available-cars-discount/')
+        self.assertEqual({car['id'] for car in response.data}, {featured.pk, expired.pk, free.pk})
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('admin')
+        created_at = timezone.now()
+        # Mismo created_at para todos: el id desempata
+        self.cars = [create_car(user, created_at=created_at, price=1000 * (number % 2)) for number in range(7)]
+        self.client = APIClient()
+
+    def traverse(self, url):
+        pages, response = [], self.client.get(url)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([car['id'] for car in response.data['results']])
+            if not response.data['next']:
+                return pages, response
+            response = self.client.get(response.data['next'])
+
+    def test_ties_on_created_at(self):
+        pages, last = self.traverse('/api/cars/?page_size=3')
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), sorted((car.pk for car in self.cars), reverse=True))
+
+        previous = self.client.get(last.data['previous'])
+        self.assertEqual([car['id'] for car in previous.data['results']], pages[1])
+
+    def test_ties_on_other_ordering(self):
+        pages, _ = self.traverse('/api/cars/?page_size=2&ordering=price')
+        expected = sorted(self.cars, key=lambda car: (car.price, car.created_at, car.pk))
+        self.assertEqual(sum(pages, []), [car.pk for car in expected])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/cars/?cursor=nada').status_code, 404)
+
+
+class FilterTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('admin')
+        self.toyota = create_car(user, price=10000, year=2018, mileage=80000)
+        self.fiat = create_car(user, brand='Fiat', price=20000, year=2021, mileage=5000, transmission='manual')
+        self.ford = create_car(user, brand='Ford', price=30000, year=2023, mileage=0)
+        Discount.objects.create(
+            vehicle_type='car', car=self.ford, discount_percentage=50,
+            start_date=timezone.now() - timedelta(days=1), end_date=timezone.now() + timedelta(days=1),
+            created_by=user,
+        )
+        self.client = APIClient()
+
+    def filter_ids(self, query):
+        response = self.client.get(f'/api/cars/?{query}')
+        self.assertEqual(response.status_code, 200, query)
+        return {car['id'] for car in response.data}
+
+    def test_ranges(self):
+        self.assertEqual(self.filter_ids('price__gte=15000&price__lte=30000'), {self.fiat.pk, self.ford.pk})
+        self.assertEqual(self.filter_ids('year__gte=2019&year__lte=2021'), {self.fiat.pk})
+        self.assertEqual(self.filter_ids('mileage__lte=5000'), {self.fiat.pk, self.ford.pk})
+        self.assertEqual(self.filter_ids('year=2018'), {self.toyota.pk})
+
+    def test_in(self):
+        self.assertEqual(self.filter_ids('brand__in=Toyota,Fiat'), {self.toyota.pk, self.fiat.pk})
+        self.assertEqual(self.filter_ids('brand__in=Fiat&transmission=automatic'), set())
+
+    def test_effective_price(self):
+        # 30000 con 50 % de descuento queda por debajo del Fiat
+        self.assertEqual(self.filter_ids('effective_price__lte=15000'), {self.toyota.pk, self.ford.pk})
+        self.assertEqual(self.filter_ids('on_sale=true'), {self.ford.pk})
+
+    def test_invalid_value(self):
+        self.assertEqual(self.client.get('/api/cars/?price__gte=barato').status_code, 400)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('admin')
+        self.title = create_car(user, title='Camión Ford', brand='Ford', model='F-100')
+        self.description = create_car(user, title='Fiat Uno', brand='Fiat', model='Uno', description='Ideal como camión de reparto')
+        self.other = create_car(user)
+        self.motorcycle = create_motorcycle(user, title='Honda Camión', brand='Honda', model='CG')
+        self.client = APIClient()
+
+    def search(self, query):
+        response = self.client.get(f'/api/search/?{query}')
+        self.assertEqual(response.status_code, 200, query)
+        return [(vehicle['vehicle_type'], vehicle['id']) for vehicle in response.data]
+
+    def test_ranking_and_accents(self):
+        # Sin acento encuentra "Camión"; el título pesa más que la descripción
+        results = self.search('q=camion&type=cars')
+        self.assertEqual(results, [('car', self.title.pk), ('car', self.description.pk)])
+
+    def test_trigram_fallback(self):
+        self.assertEqual(self.search('q=Toyotta&type=cars'), [('car', self.other.pk)])
+
+    def test_type_all_merges_cars_and_motorcycles(self):
+        results = self.search('q=camion')
+        self.assertEqual(set(results), {
+            ('car', self.title.pk), ('car', self.description.pk), ('motorcycle', self.motorcycle.pk),
+        })
+        self.assertEqual(results[-1], ('car', self.description.pk))
+        self.assertEqual(self.search('q=camion&type=motorcycles'), [('motorcycle', self.motorcycle.pk)])
+
+    def test_filters_narrow_results(self):
+        self.assertEqual(self.search('q=camion&type=all&brand=Fiat'), [('car', self.description.pk)])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_CACHE_MAX_AGE=60, MEDIA_SENDFILE='')
+class MediaTests(TestCase):
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.name = default_storage.save('media-tests/archivo.bin', ContentFile(self.content))
+        self.addCleanup(default_storage.delete, self.name)
+        self.url = f'/media/{self.name}'
+
+    def test_hashed_name_is_immutable(self):
+        self.assertRegex(self.name, r'^media-tests/archivo\.[0-9a-f]{12}\.bin$')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn(f'max-age={IMMUTABLE_MAX_AGE}', response['Cache-Control'])
+
+    def test_unhashed_name_revalidates(self):
+        path = os.path.join(MEDIA_ROOT, 'media-tests', 'plano.bin')
+        with open(path, 'wb') as file:
+            file.write(self.content)
+        self.addCleanup(os.remove, path)
+        response = self.client.get('/media/media-tests/plano.bin')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+    def test_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_range_on_empty_file(self):
+        name = default_storage.save('media-tests/vacio.bin', ContentFile(b''))
+        self.addCleanup(default_storage.delete, name)
+        response = self.client.get(f'/media/{name}', HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Range', response)
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    def test_if_range_mismatch_sends_whole_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otro"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_sendfile(self):
+        with self.settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+
+    def test_path_traversal(self):
+        self.assertEqual(self.client.get('/media/..%2F..%2Fmanage.py').status_code, 404)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('admin')
+        self.old = create_car(self.user, title='Fiat, "Uno"', brand='Fiat', created_at=timezone.now() - timedelta(days=1))
+        self.new = create_car(self.user, is_sold=True)
+        Discount.objects.create(
+            vehicle_type='car', car=self.new, discount_percentage=10,
+            start_date=timezone.now() - timedelta(days=1), end_date=timezone.now() + timedelta(days=1),
+            created_by=self.user,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response, content = self.export('/api/export/cars.csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="autos.csv"')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0][:3], ['ID', 'Título', 'Marca'])
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.new.pk), str(self.old.pk)])
+        self.assertEqual(rows[2][1], 'Fiat, "Uno"')
+        header = rows[0]
+        expected = (Decimal(self.new.price) * Decimal('0.90')).quantize(Decimal('0.01'))
+        self.assertEqual(Decimal(rows[1][header.index('Precio con Descuento')]), expected)
+        self.assertEqual(rows[1][header.index('Vendido')], 'Sí')
+        self.assertEqual(rows[1][header.index('Creado por')], 'admin')
+
+    def test_ndjson_with_filters(self):
+        response, content = self.export('/api/export/cars.ndjson?brand=Fiat')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], self.old.pk)
+        self.assertEqual(rows[0]['created_by'], 'admin')
+        self.assertIs(rows[0]['is_sold'], False)
+
+    def test_rows_are_sent_in_chunks(self):
+        for _ in range(3):
+            create_car(self.user)
+        with mock.patch('vehicles.exports.ROWS_PER_WRITE', 2):
+            response = self.client.get('/api/export/cars.ndjson')
+            chunks = list(response.streaming_content)
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [2, 2, 1])
+
+    def test_unknown_resource_and_anonymous(self):
+        self.assertEqual(self.client.get('/api/export/users.csv').status_code, 404)
+        self.assertEqual(self.client.get('/api/export/cars.xml').status_code, 404)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/export/cars.csv').status_code, 401)
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('admin')
+        self.car = create_car(user)
+        self.other = create_car(user, brand='Fiat', model='Uno')
+        self.featured = FeaturedItem.objects.create(vehicle_type='car', car=self.car, created_by=user)
+        window = {'start_date': timezone.now(), 'end_date': timezone.now() + timedelta(days=7), 'created_by': user}
+        self.discount = Discount.objects.create(vehicle_type='car', car=self.car, discount_percentage=10, **window)
+        self.inactive = Discount.objects.create(
+            vehicle_type='car', car=self.other, discount_percentage=10, is_active=False, **window
+        )
+        # update() no pasa por las señales: las copias quedan desactualizadas
+        Car.objects.filter(pk__in=[self.car.pk, self.other.pk]).update(price=20000, year=2022)
+
+    def test_detects_drift(self):
+        self.assertEqual(list(stale_snapshots(Car, FeaturedItem)), [self.featured])
+        # Los descuentos inactivos conservan su precio
+        self.assertEqual(list(stale_snapshots(Car, Discount)), [self.discount])
+        self.assertFalse(stale_snapshots(Car, FeaturedItem, [self.other.pk]).exists())
+        self.assertFalse(stale_snapshots(Motorcycle, FeaturedItem).exists())
+
+    def test_sync(self):
+        self.assertEqual(sync_snapshots(Car), {FeaturedItem: 1, Discount: 1})
+        self.featured.refresh_from_db()
+        self.discount.refresh_from_db()
+        self.inactive.refresh_from_db()
+        self.assertEqual((self.featured.title, self.featured.price), ('Toyota Corolla (2022)', 20000))
+        self.assertEqual((self.discount.title, self.discount.original_price), ('Toyota Corolla (2022)', 20000))
+        self.assertEqual(self.inactive.original_price, 15000)
+        self.assertEqual(sync_snapshots(Car), {FeaturedItem: 0, Discount: 0})
+
+    def test_saving_vehicle_syncs(self):
+        self.car.refresh_from_db()
+        self.car.price = 18000
+        self.car.save()
+        self.featured.refresh_from_db()
+        self.assertEqual((self.featured.title, self.featured.price), ('Toyota Corolla (2022)', 18000))
+
+    def test_command(self):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with self.assertRaises(SystemExit) as raised:
+            call_command('sync_snapshots', '--check', stdout=stdout, stderr=stderr)
+        self.assertEqual(raised.exception.code, 1)
+        self.assertIn('2 copias desactualizadas', stderr.getvalue())
+        self.assertTrue(stale_snapshots(Car, FeaturedItem).exists())
+
+        call_command('sync_snapshots', stdout=stdout)
+        self.assertIn('2 copias corregidas', stdout.getvalue())
+        call_command('sync_snapshots', '--check', stdout=stdout)
+        self.assertIn('Sin diferencias', stdout.getvalue())
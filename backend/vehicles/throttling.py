@@ -0,0 +1,143 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .models import Subscriber
+
+KEY_PREFIX = 'throttle'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'5/min' -> (capacidad 5, 5 fichas cada 60 s), mismo formato que DRF."""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+def take_token(state, capacity, period, now):
+    """
+    Cubeta de fichas: se llena a razón de capacity/period por segundo hasta
+    ``capacity`` y cada petición gasta una. Devuelve (nuevo estado,
+    permitido, segundos hasta la próxima ficha).
+    """
+    refill = capacity / period
+    tokens, updated = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * refill)
+    if tokens >= 1:
+        return (tokens - 1, now), True, 0.0
+    return (tokens, now), False, (1 - tokens) / refill
+
+
+class LocalBucketBackend:
+    """
+    Cubetas en memoria de cada proceso; con varios procesos el límite es por
+    proceso. Se guardan a lo sumo THROTTLE_LOCAL_MAX_KEYS claves y se
+    descarta la usada hace más tiempo, que puede no estar llena: si entre
+    dos peticiones de un cliente llegan más claves distintas que ese límite,
+    el cliente vuelve a empezar con la cubeta llena.
+    """
+
+    def __init__(self, max_keys=None):
+        self.max_keys = max_keys or settings.THROTTLE_LOCAL_MAX_KEYS
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def consume(self, key, capacity, period):
+        now = time.monotonic()
+        with self._lock:
+            state, allowed, wait = take_token(self._buckets.get(key), capacity, period, now)
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            # LRU por último uso, no por estado de la cubeta (ver la clase)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+
+class CacheBucketBackend:
+    """
+    Cubetas en una caché de Django compartida entre procesos (Redis en
+    producción). Leer y escribir no es atómico: en ráfagas concurrentes de
+    la misma clave pueden pasar unas pocas peticiones de más.
+    """
+
+    def __init__(self):
+        self.cache = caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def consume(self, key, capacity, period):
+        now = time.time()
+        state, allowed, wait = take_token(self.cache.get(key), capacity, period, now)
+        # Pasado un período la cubeta está llena y ya no hace falta guardarla
+        self.cache.set(key, state, math.ceil(period) + 1)
+        return allowed, wait
+
+
+_backends = {}
+
+
+def get_backend():
+    path = settings.THROTTLE_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Limita las escrituras de una vista según ``throttle_scope``, por IP del
+    cliente salvo que una subclase cambie ``get_key``. La tasa de cada clave
+    sale de DEFAULT_THROTTLE_RATES['<scope>_<key_name>'] y admite ráfagas de
+    hasta el total del período.
+
+    La IP es la de get_ident(): REMOTE_ADDR, o la que agrega el último de
+    los NUM_PROXIES proxies de confianza en X-Forwarded-For.
+    """
+    key_name = 'ip'
+    methods = ('POST',)
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None or request.method not in self.methods:
+            return True
+        key = self.get_key(request, view)
+        if not key:
+            return True
+        rate_name = f'{scope}_{self.key_name}'
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(rate_name)
+        if rate is None:
+            raise ImproperlyConfigured(f'Falta DEFAULT_THROTTLE_RATES["{rate_name}"]')
+        capacity, period = parse_rate(rate)
+        allowed, self._wait = get_backend().consume(f'{KEY_PREFIX}:{rate_name}:{key}', capacity, period)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class EmailBucketThrottle(TokenBucketThrottle):
+    # Una misma dirección desde muchas IPs (o la misma desde varias pestañas)
+    key_name = 'email'
+
+    def get_key(self, request, view):
+        data = request.data
+        email = data.get('email') if hasattr(data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return hashlib.sha256(Subscriber.normalize_email(email).encode()).hexdigest()[:32]
+
+
+def reset_buckets():
+    # Las cubetas locales empiezan de nuevo (tests)
+    _backends.clear()
@@ -14,16 +14,28 @@ urlpatterns = [
     path('motorcycles/<int:pk>/', views.MotorcycleDetailView.as_view(), name='motorcycle-detail'),
     
     path('search/', views.SearchView.as_view(), name='search'),
+    path('vehicles/', views.VehicleFeedView.as_view(), name='vehicle-feed'),
     
     path('contact-messages/', views.ContactMessageListCreateView.as_view(), name='contact-message-list'),
     path('contact-messages/<int:pk>/', views.ContactMessageDetailView.as_view(), name='contact-message-detail'),
     
     path('subscribers/', views.SubscriberListCreateView.as_view(), name='subscriber-list'),
     path('subscribers/<int:pk>/', views.SubscriberDetailView.as_view(), name='subscriber-detail'),
-    path('subscribers/export/', views.export_subscribers, name='subscriber-export'),
+    path('subscribers/export/', views.export_data, {'resource': 'subscribers'}, name='subscriber-export'),
+    path('batch/featured/create/', views.FeaturedBatchCreateView.as_view(), name='featured-batch-create'),
+    path('batch/discounts/create/', views.DiscountBatchCreateView.as_view(), name='discount-batch-create'),
+    path('batch/<slug:resource>/update/', views.BatchUpdateView.as_view(), name='batch-update'),
+    path('batch/<slug:resource>/delete/', views.BatchDeleteView.as_view(), name='batch-delete'),
+    path('import/<slug:vehicle_type>/', views.InventoryImportView.as_view(), name='inventory-import'),
+    path('export/<slug:resource>.<slug:export_format>', views.export_data, name='export'),
     
     path('users/', views.UserListView.as_view(), name='user-list'),
     
+    path('stats/', views.DashboardStatsView.as_view(), name='dashboard-stats'),
+    path('cache-stats/', views.CacheStatsView.as_view(), name='cache-stats'),
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
+    path('image-jobs/', views.ImageJobListView.as_view(), name='image-job-list'),
+    
     # Featured items endpoints
     path('featured/', views.FeaturedItemListCreateView.as_view(), name='featured-list'),
     path('featured/<int:pk>/', views.FeaturedItemDetailView.as_view(), name='featured-detail'),
@@ -32,6 +44,7 @@ urlpatterns = [
     
     # Discount endpoints
     path('discounts/', views.DiscountListCreateView.as_view(), name='discount-list'),
+    path('discounts/active/', views.ActiveDiscountListView.as_view(), name='discount-active'),
     path('discounts/<int:pk>/', views.DiscountDetailView.as_view(), name='discount-detail'),
     path('available-cars-discount/', views.AvailableCarsForDiscountListView.as_view(), name='available-cars-discount'),
     path('available-motorcycles-discount/', views.AvailableMotorcyclesForDiscountListView.as_view(), name='available-motorcycles-discount'),
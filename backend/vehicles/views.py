@@ -1,44 +1,88 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.pagination import _positive_int
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import api_view, permission_classes
 from django.contrib.auth.models import User
-from django.db.models import Q
-from .models import Car, Motorcycle, ContactMessage, Subscriber, FeaturedItem, Discount
+from django.db.models import Exists, OuterRef
+from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
+from .models import Car, Motorcycle, ContactMessage, Subscriber, FeaturedItem, Discount, ImageJob
+from .filters import CarFilter, MotorcycleFilter
+from .cache import (
+    CachedResponseMixin,
+    NAMESPACE_CARS,
+    NAMESPACE_DISCOUNTS,
+    NAMESPACE_FEATURED,
+    NAMESPACE_MOTORCYCLES,
+    counters as cache_counters,
+    get_cache,
+    get_timeout,
+    is_shared_cache,
+)
+from .conditional import ConditionalGetMixin
+from .discounts import discount_window_marker, with_effective_price
+from .feed import car_feed_queryset, motorcycle_feed_queryset, feed_ordering, vehicle_ordering
+from .pagination import KeysetCursorPagination, UnionKeysetCursorPagination
+from .projections import (
+    CarValuesSerializer,
+    MotorcycleValuesSerializer,
+    FeaturedItemValuesSerializer,
+    DiscountValuesSerializer,
+)
+from .search import search_vehicles
+from .stats import MAX_RECENT, get_dashboard_stats, invalidate_dashboard_stats
 from .serializers import (
     CarSerializer, 
     MotorcycleSerializer, 
     UserSerializer, 
     ContactMessageSerializer,
     SubscriberSerializer,
+    SubscriptionSerializer,
     FeaturedItemSerializer,
-    DiscountSerializer
+    DiscountSerializer,
+    ImageJobSerializer,
+    VehicleFeedSerializer,
+    BatchDeleteSerializer,
+    BatchUpdateSerializer,
+    BatchVehiclesSerializer,
+    BatchDiscountSerializer
 )
-from rest_framework_simplejwt.tokens import RefreshToken
-import csv
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
+from .exports import EXPORTS, FORMAT_CSV, STREAMERS, export_response
+from .batch import (
+    BATCH_RESOURCES,
+    batch_create_discounts,
+    batch_create_featured,
+    batch_delete,
+    batch_update,
+    batch_update_items,
+)
+from .authentication import ClaimsTokenObtainPairSerializer, model_user
+from .metrics import METRICS_CONTENT_TYPE, MetricsPermission, expose_metrics
+from .throttling import EmailBucketThrottle, TokenBucketThrottle
+from .imports import ImageArchive, InventoryImportError, detect_format, import_inventory, read_rows
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def export_subscribers(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="suscriptores.csv"'
-    
-    subscribers = Subscriber.objects.all().order_by('-subscription_date')
-    
-    writer = csv.writer(response)
-    writer.writerow(['Email', 'Fecha de Suscripción', 'Estado'])
-    
-    for subscriber in subscribers:
-        writer.writerow([
-            subscriber.email,
-            subscriber.subscription_date.strftime('%Y-%m-%d %H:%M'),
-            'Activo' if subscriber.is_active else 'Inactivo'
-        ])
-    
-    return response
+def export_data(request, resource, export_format=FORMAT_CSV):
+    """
+    /api/export/<recurso>.<csv|ndjson>: se envía en streaming mientras se lee
+    la base de datos. Autos y motos aceptan los mismos filtros que su listado.
+    """
+    export = EXPORTS.get(resource)
+    if export is None or export_format not in STREAMERS:
+        raise Http404
+    queryset = export.get_queryset()
+    if export.filterset_class is not None:
+        filterset = export.filterset_class(request.query_params, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        queryset = filterset.qs
+    return export_response(export, queryset, export_format)
 
 class UserRegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -54,17 +98,79 @@ class UserRegistrationView(generics.CreateAPIView):
             password=request.data.get('password')
         )
         
-        refresh = RefreshToken.for_user(user)
+        # Mismos claims que /api/token/ (ver authentication.py)
+        refresh = ClaimsTokenObtainPairSerializer.get_token(user)
         return Response({
             'user': serializer.data,
             'refresh': str(refresh),
             'access': str(refresh.access_token),
         }, status=status.HTTP_201_CREATED)
 
-class CarListCreateView(generics.ListCreateAPIView):
-    queryset = Car.objects.all().order_by('-created_at')
+class EffectivePriceMixin:
+    """
+    Autos y motos con su precio efectivo (discounts.with_effective_price):
+    acepta ?ordering= también por effective_price y separa caché y ETag
+    cada vez que un descuento empieza o termina.
+    """
+    
+    @property
+    def keyset_ordering(self):
+        return vehicle_ordering(self.request.query_params.get('ordering', '-created_at'))
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in permissions.SAFE_METHODS:
+            return queryset
+        return with_effective_price(queryset).order_by(*self.keyset_ordering)
+    
+    def get_cache_variant(self):
+        return discount_window_marker()
+
+class ValuesListMixin:
+    """
+    El GET de listado se arma con un ValuesSerializer (ver projections.py)
+    a partir de values(), con la misma salida que serializer_class. Crear,
+    editar y el detalle siguen usando el serializer de DRF.
+    
+    ?fields=id,title,price y ?exclude=description limitan los campos de la
+    respuesta y las columnas leídas; ?fields=summary es la versión compacta
+    para tarjetas de autos y motos.
+    """
+    values_serializer_class = None
+    
+    def get_values_serializer(self):
+        params = self.request.query_params
+        fields, exclude = [
+            [name.strip() for name in params[param].split(',') if name.strip()] if param in params else None
+            for param in ('fields', 'exclude')
+        ]
+        return self.values_serializer_class(
+            context=self.get_serializer_context(), fields=fields, exclude=exclude,
+        )
+    
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        # El cursor se arma con los campos del ordenamiento aunque no se muestren
+        ordering = self.paginator.get_ordering(self) if hasattr(self.paginator, 'get_ordering') else []
+        queryset = serializer.project(
+            self.filter_queryset(self.get_queryset()),
+            required=[field.lstrip('-') for field in ordering],
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+        return Response(serializer.to_representation(queryset))
+
+class CarListCreateView(EffectivePriceMixin, ConditionalGetMixin, CachedResponseMixin, ValuesListMixin, generics.ListCreateAPIView):
+    queryset = Car.objects.select_related('created_by').order_by('-created_at', '-id')
     serializer_class = CarSerializer
+    values_serializer_class = CarValuesSerializer
+    cache_namespaces = [NAMESPACE_CARS, NAMESPACE_DISCOUNTS]
+    conditional_models = [Discount]
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = KeysetCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = CarFilter
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -72,21 +178,29 @@ class CarListCreateView(generics.ListCreateAPIView):
         return context
     
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        serializer.save(created_by=model_user(self.request.user))
 
-class CarDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Car.objects.all()
+class CarDetailView(EffectivePriceMixin, ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Car.objects.select_related('created_by')
     serializer_class = CarSerializer
+    cache_namespaces = [NAMESPACE_CARS, NAMESPACE_DISCOUNTS]
+    conditional_models = [Discount]
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
-class MotorcycleListCreateView(generics.ListCreateAPIView):
-    queryset = Motorcycle.objects.all().order_by('-created_at')
+class MotorcycleListCreateView(EffectivePriceMixin, ConditionalGetMixin, CachedResponseMixin, ValuesListMixin, generics.ListCreateAPIView):
+    queryset = Motorcycle.objects.select_related('created_by').order_by('-created_at', '-id')
     serializer_class = MotorcycleSerializer
+    values_serializer_class = MotorcycleValuesSerializer
+    cache_namespaces = [NAMESPACE_MOTORCYCLES, NAMESPACE_DISCOUNTS]
+    conditional_models = [Discount]
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = KeysetCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = MotorcycleFilter
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -94,53 +208,267 @@ class MotorcycleListCreateView(generics.ListCreateAPIView):
         return context
     
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        serializer.save(created_by=model_user(self.request.user))
 
-class MotorcycleDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Motorcycle.objects.all()
+class MotorcycleDetailView(EffectivePriceMixin, ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Motorcycle.objects.select_related('created_by')
     serializer_class = MotorcycleSerializer
+    cache_namespaces = [NAMESPACE_MOTORCYCLES, NAMESPACE_DISCOUNTS]
+    conditional_models = [Discount]
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
-class SearchView(generics.ListAPIView):
+class SearchView(EffectivePriceMixin, CachedResponseMixin, generics.ListAPIView):
     serializer_class = CarSerializer
+    cache_namespaces = [NAMESPACE_CARS, NAMESPACE_MOTORCYCLES, NAMESPACE_DISCOUNTS]
+    default_limit = 50
+    max_limit = 200
     
-    def get_queryset(self):
-        query = self.request.query_params.get('q', '')
-        vehicle_type = self.request.query_params.get('type', 'all')
+    # Tipos aceptados en ?type= y los modelos en los que busca cada uno
+    search_types = {
+        'all': ['car', 'motorcycle'],
+        'cars': ['car'],
+        'motorcycles': ['motorcycle'],
+    }
+    vehicle_serializers = {
+        'car': (Car, CarSerializer, CarFilter),
+        'motorcycle': (Motorcycle, MotorcycleSerializer, MotorcycleFilter),
+    }
+    
+    def get_limit(self):
+        try:
+            return _positive_int(self.request.query_params['limit'], strict=True, cutoff=self.max_limit)
+        except (KeyError, ValueError):
+            return self.default_limit
+    
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        vehicle_type = request.query_params.get('type', 'all')
+        types = self.search_types.get(vehicle_type, [])
         
-        if vehicle_type == 'cars' or vehicle_type == 'all':
-            cars = Car.objects.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(brand__icontains=query) |
-                Q(model__icontains=query)
+        # Los filtros del listado (precio efectivo, marca...) acotan la búsqueda
+        querysets = []
+        for name in types:
+            model, _, filterset_class = self.vehicle_serializers[name]
+            filterset = filterset_class(
+                request.query_params,
+                queryset=with_effective_price(model.objects.select_related('created_by')),
+                request=request,
             )
+            if not filterset.is_valid():
+                raise translate_validation(filterset.errors)
+            querysets.append(filterset.qs)
+        results = search_vehicles(querysets, query, self.get_limit())
         
-        if vehicle_type == 'motorcycles' or vehicle_type == 'all':
-            motorcycles = Motorcycle.objects.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(brand__icontains=query) |
-                Q(model__icontains=query)
+        # Con ?ordering= se reordenan los resultados encontrados
+        if 'ordering' in request.query_params:
+            field, tie_breaker = [name.lstrip('-') for name in self.keyset_ordering]
+            results.sort(
+                key=lambda vehicle: (getattr(vehicle, field), getattr(vehicle, tie_breaker)),
+                reverse=self.keyset_ordering[0].startswith('-'),
             )
         
-        if vehicle_type == 'all':
-            return cars
-        elif vehicle_type == 'cars':
-            return cars
-        elif vehicle_type == 'motorcycles':
-            return motorcycles
+        # Serializar cada tipo de una vez y respetar el orden de relevancia
+        context = self.get_serializer_context()
+        serialized = {}
+        for name in types:
+            model, serializer_class, _ = self.vehicle_serializers[name]
+            vehicles = [vehicle for vehicle in results if isinstance(vehicle, model)]
+            for vehicle, data in zip(vehicles, serializer_class(vehicles, many=True, context=context).data):
+                data['vehicle_type'] = name
+                serialized[(model, vehicle.pk)] = data
         
-        return Car.objects.none()
+        data = [serialized[(type(vehicle), vehicle.pk)] for vehicle in results]
+        return Response(data)
+
+class VehicleFeedView(EffectivePriceMixin, CachedResponseMixin, generics.ListAPIView):
+    """
+    Autos y motos en un único listado paginado, resuelto con un UNION ALL
+    sobre una proyección común. Acepta los mismos filtros que /cars/ y
+    /motorcycles/; los filtros propios de un tipo (transmission, category)
+    dejan fuera al otro.
+    """
+    serializer_class = VehicleFeedSerializer
+    pagination_class = UnionKeysetCursorPagination
+    cache_namespaces = [NAMESPACE_CARS, NAMESPACE_MOTORCYCLES, NAMESPACE_DISCOUNTS]
+    
+    vehicle_types = {
+        'car': (CarFilter, car_feed_queryset, 'transmission'),
+        'motorcycle': (MotorcycleFilter, motorcycle_feed_queryset, 'category'),
+    }
+    search_types = SearchView.search_types
+    
+    @property
+    def keyset_ordering(self):
+        return feed_ordering(self.request.query_params.get('ordering', '-created_at'))
+    
+    def get_types(self):
+        params = self.request.query_params
+        types = self.search_types.get(params.get('type', 'all'), [])
+        # Los formularios mandan ?transmission= vacío cuando no se elige nada
+        used_filters = {key.split('__')[0] for key, values in params.lists() if any(values)}
+        for name, (_, _, own_filter) in self.vehicle_types.items():
+            if own_filter in used_filters:
+                types = [t for t in types if t == name]
+        return types
+    
+    def get_queryset(self):
+        querysets = []
+        for name in self.get_types():
+            filterset_class, projection, _ = self.vehicle_types[name]
+            filterset = filterset_class(
+                self.request.query_params,
+                queryset=with_effective_price(filterset_class._meta.model.objects.all()),
+                request=self.request,
+            )
+            if not filterset.is_valid():
+                raise translate_validation(filterset.errors)
+            querysets.append(projection(filterset.qs))
+        return querysets
+
+class DashboardStatsView(generics.GenericAPIView):
+    """
+    Totales y vehículos recientes del dashboard, calculados con agregados en
+    la base de datos y cacheados por poco tiempo (ver stats.py).
+    """
+    serializer_class = VehicleFeedSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    default_recent = 5
+    
+    def get(self, request, *args, **kwargs):
+        try:
+            recent = _positive_int(request.query_params['recent'], cutoff=MAX_RECENT)
+        except (KeyError, ValueError):
+            recent = self.default_recent
+        
+        stats = dict(get_dashboard_stats())
+        for key in ('recent_cars', 'recent_motorcycles'):
+            stats[key] = self.get_serializer(stats[key][:recent], many=True).data
+        return Response(stats)
+
+class CacheStatsView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, *args, **kwargs):
+        stats = cache_counters.snapshot()
+        stats['backend'] = get_cache().__class__.__name__
+        stats['shared'] = is_shared_cache()
+        stats['timeout'] = get_timeout()
+        return Response(stats)
+
+class MetricsView(generics.GenericAPIView):
+    """
+    Métricas del proceso en formato de texto de Prometheus (ver metrics.py).
+    Con METRICS_TOKEN el scraper se identifica con ese token en vez de un JWT.
+    """
+    permission_classes = [MetricsPermission]
+    
+    def get_authenticators(self):
+        # El token de métricas no es un JWT: JWTAuthentication lo rechazaría
+        if settings.METRICS_TOKEN:
+            return []
+        return super().get_authenticators()
+    
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(expose_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+class ImageJobListView(generics.ListAPIView):
+    # Estado de la cola de imágenes; ?status=pending|running|done|failed
+    serializer_class = ImageJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = ImageJob.objects.order_by('-created_at')
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        return queryset[:200]
+
+class InventoryImportView(generics.GenericAPIView):
+    """
+    Carga masiva: multipart con ``file`` (CSV o JSON, mismas columnas que el
+    alta individual; ``image`` es el nombre del archivo dentro del ZIP) e
+    ``images`` (ZIP). ?dry_run=1 solo valida.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+    models = {'cars': Car, 'motorcycles': Motorcycle}
+    
+    def post(self, request, vehicle_type, *args, **kwargs):
+        model = self.models.get(vehicle_type)
+        if model is None:
+            raise Http404
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': ['Este campo es requerido.']}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rows = read_rows(upload, detect_format(upload.name))
+            images = ImageArchive(request.FILES['images']) if 'images' in request.FILES else None
+        except InventoryImportError as error:
+            return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        report = import_inventory(
+            model, rows, model_user(request.user), images=images,
+            dry_run=request.query_params.get('dry_run') in ('1', 'true'),
+        )
+        failed = report['errors'] and not report['valid']
+        return Response(report, status=status.HTTP_400_BAD_REQUEST if failed else status.HTTP_200_OK)
+
+# Operaciones en lote del panel: una transacción y un resultado por elemento
+class BatchUpdateView(generics.GenericAPIView):
+    serializer_class = BatchUpdateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, resource, *args, **kwargs):
+        if resource not in BATCH_RESOURCES:
+            raise Http404
+        model, model_serializer = BATCH_RESOURCES[resource]
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if 'items' in data:
+            return Response(batch_update_items(model, model_serializer, data['items']))
+        return Response(batch_update(model, model_serializer, data['ids'], data['changes']))
+
+class BatchDeleteView(generics.GenericAPIView):
+    serializer_class = BatchDeleteSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, resource, *args, **kwargs):
+        if resource not in BATCH_RESOURCES:
+            raise Http404
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        model, _ = BATCH_RESOURCES[resource]
+        return Response(batch_delete(model, serializer.validated_data['ids']))
+
+class FeaturedBatchCreateView(generics.GenericAPIView):
+    serializer_class = BatchVehiclesSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(batch_create_featured(model_user(request.user), **serializer.validated_data))
+
+class DiscountBatchCreateView(generics.GenericAPIView):
+    serializer_class = BatchDiscountSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(batch_create_discounts(model_user(request.user), **serializer.validated_data))
 
 class ContactMessageListCreateView(generics.ListCreateAPIView):
     queryset = ContactMessage.objects.all().order_by('-date')
     serializer_class = ContactMessageSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [TokenBucketThrottle, EmailBucketThrottle]
+    throttle_scope = 'contact'
     
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -156,11 +484,31 @@ class SubscriberListCreateView(generics.ListCreateAPIView):
     queryset = Subscriber.objects.all().order_by('-subscription_date')
     serializer_class = SubscriberSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [TokenBucketThrottle, EmailBucketThrottle]
+    throttle_scope = 'subscribe'
     
     def get_permissions(self):
         if self.request.method == 'POST':
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
+    
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return SubscriptionSerializer
+        return SubscriberSerializer
+    
+    def create(self, request, *args, **kwargs):
+        # Idempotente: suscribirse dos veces devuelve 200 con el suscriptor existente
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        subscriber, created = Subscriber.objects.subscribe(**serializer.validated_data)
+        if created:
+            # subscribe() no pasa por save(), así que no hay post_save
+            invalidate_dashboard_stats()
+        return Response(
+            SubscriberSerializer(subscriber).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
 
 class SubscriberDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Subscriber.objects.all()
@@ -171,9 +519,11 @@ class UserListView(generics.ListAPIView):
     serializer_class = UserSerializer
 
 # Featured Items Views
-class FeaturedItemListCreateView(generics.ListCreateAPIView):
+class FeaturedItemListCreateView(ConditionalGetMixin, CachedResponseMixin, ValuesListMixin, generics.ListCreateAPIView):
     queryset = FeaturedItem.objects.all().order_by('-created_at')
     serializer_class = FeaturedItemSerializer
+    values_serializer_class = FeaturedItemValuesSerializer
+    cache_namespaces = [NAMESPACE_FEATURED]
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_context(self):
@@ -182,11 +532,12 @@ class FeaturedItemListCreateView(generics.ListCreateAPIView):
         return context
     
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        serializer.save(created_by=model_user(self.request.user))
 
-class FeaturedItemDetailView(generics.RetrieveUpdateDestroyAPIView):
+class FeaturedItemDetailView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = FeaturedItem.objects.all()
     serializer_class = FeaturedItemSerializer
+    cache_namespaces = [NAMESPACE_FEATURED]
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_context(self):
@@ -194,44 +545,56 @@ class FeaturedItemDetailView(generics.RetrieveUpdateDestroyAPIView):
         context['request'] = self.request
         return context
 
-class AvailableCarsListView(generics.ListAPIView):
-    serializer_class = CarSerializer
+class AvailableVehiclesListView(ValuesListMixin, generics.ListAPIView):
+    """
+    Vehículos que todavía se pueden destacar o poner en descuento. Se
+    excluyen con NOT EXISTS sobre el índice de la relación en lugar de una
+    lista de ids; admite la paginación por cursor de los listados.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    model = None
+    vehicle_field = None
+    # Lo que ya ocupa al vehículo: destacados por defecto
+    taken_queryset = FeaturedItem.objects.all()
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
     
+    def get_taken(self):
+        # .all() para no reutilizar el resultado entre peticiones, como DRF con queryset
+        return self.taken_queryset.all()
+    
     def get_queryset(self):
-        # Excluir autos que ya están destacados
-        featured_car_ids = FeaturedItem.objects.filter(
-            vehicle_type='car'
-        ).exclude(car__isnull=True).values_list('car_id', flat=True)
-        
-        return Car.objects.exclude(id__in=featured_car_ids).order_by('-created_at')
+        taken = self.get_taken().filter(**{self.vehicle_field: OuterRef('pk')})
+        return (
+            self.model.objects.filter(~Exists(taken))
+            .select_related('created_by')
+            .order_by('-created_at', '-id')
+        )
 
-class AvailableMotorcyclesListView(generics.ListAPIView):
+class AvailableCarsListView(AvailableVehiclesListView):
+    # Autos que no están destacados
+    serializer_class = CarSerializer
+    values_serializer_class = CarValuesSerializer
+    model = Car
+    vehicle_field = 'car'
+
+class AvailableMotorcyclesListView(AvailableVehiclesListView):
+    # Motos que no están destacadas
     serializer_class = MotorcycleSerializer
-    permission_classes = [permissions.IsAuthenticated]
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
-    
-    def get_queryset(self):
-        # Excluir motos que ya están destacadas
-        featured_motorcycle_ids = FeaturedItem.objects.filter(
-            vehicle_type='motorcycle'
-        ).exclude(motorcycle__isnull=True).values_list('motorcycle_id', flat=True)
-        
-        return Motorcycle.objects.exclude(id__in=featured_motorcycle_ids).order_by('-created_at')
+    values_serializer_class = MotorcycleValuesSerializer
+    model = Motorcycle
+    vehicle_field = 'motorcycle'
 
 # Discount Views
-class DiscountListCreateView(generics.ListCreateAPIView):
-    queryset = Discount.objects.all().order_by('-created_at')
+class DiscountListCreateView(CachedResponseMixin, ValuesListMixin, generics.ListCreateAPIView):
+    queryset = Discount.objects.with_new_price().order_by('-created_at')
     serializer_class = DiscountSerializer
+    values_serializer_class = DiscountValuesSerializer
+    cache_namespaces = [NAMESPACE_DISCOUNTS]
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_context(self):
@@ -240,11 +603,12 @@ class DiscountListCreateView(generics.ListCreateAPIView):
         return context
     
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        serializer.save(created_by=model_user(self.request.user))
 
-class DiscountDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Discount.objects.all()
+class DiscountDetailView(CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Discount.objects.with_new_price()
     serializer_class = DiscountSerializer
+    cache_namespaces = [NAMESPACE_DISCOUNTS]
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_context(self):
@@ -252,38 +616,47 @@ class DiscountDetailView(generics.RetrieveUpdateDestroyAPIView):
         context['request'] = self.request
         return context
 
-class AvailableCarsForDiscountListView(generics.ListAPIView):
-    serializer_class = CarSerializer
-    permission_classes = [permissions.IsAuthenticated]
+class ActiveDiscountListView(CachedResponseMixin, ValuesListMixin, generics.ListAPIView):
+    # Descuentos vigentes para el sitio público: una consulta sobre
+    # discount_active_window_idx.
+    serializer_class = DiscountSerializer
+    values_serializer_class = DiscountValuesSerializer
+    cache_namespaces = [NAMESPACE_DISCOUNTS]
+    permission_classes = [permissions.AllowAny]
     
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
+    def get_cache_variant(self):
+        return discount_window_marker()
     
     def get_queryset(self):
-        # Excluir autos que ya tienen descuento activo
-        discounted_car_ids = Discount.objects.filter(
-            vehicle_type='car',
-            is_active=True
-        ).exclude(car__isnull=True).values_list('car_id', flat=True)
-        
-        return Car.objects.exclude(id__in=discounted_car_ids).order_by('-created_at')
-
-class AvailableMotorcyclesForDiscountListView(generics.ListAPIView):
-    serializer_class = MotorcycleSerializer
-    permission_classes = [permissions.IsAuthenticated]
+        queryset = Discount.objects.active().with_new_price().order_by('end_date', 'id')
+        vehicle_type = self.request.query_params.get('type')
+        if vehicle_type in ('car', 'motorcycle'):
+            queryset = queryset.filter(vehicle_type=vehicle_type)
+        return queryset
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
+
+class AvailableCarsForDiscountListView(AvailableVehiclesListView):
+    # Autos sin un descuento activo que no haya vencido
+    serializer_class = CarSerializer
+    values_serializer_class = CarValuesSerializer
+    model = Car
+    vehicle_field = 'car'
     
-    def get_queryset(self):
-        # Excluir motos que ya tienen descuento activo
-        discounted_motorcycle_ids = Discount.objects.filter(
-            vehicle_type='motorcycle',
-            is_active=True
-        ).exclude(motorcycle__isnull=True).values_list('motorcycle_id', flat=True)
-        
-        return Motorcycle.objects.exclude(id__in=discounted_motorcycle_ids).order_by('-created_at')
\ No newline at end of file
+    def get_taken(self):
+        # live() depende de la hora de la petición
+        return Discount.objects.live()
+
+class AvailableMotorcyclesForDiscountListView(AvailableVehiclesListView):
+    # Motos sin un descuento activo que no haya vencido
+    serializer_class = MotorcycleSerializer
+    values_serializer_class = MotorcycleValuesSerializer
+    model = Motorcycle
+    vehicle_field = 'motorcycle'
+    
+    def get_taken(self):
+        # live() depende de la hora de la petición
+        return Discount.objects.live()
@@ -45,7 +45,6 @@ export class DashboardComponent implements OnInit, AfterViewInit, OnDestroy {
 
   ngOnInit(): void {
     this.loadStats();
-    this.loadRecentVehicles();
   }
 
   ngAfterViewInit(): void {
@@ -61,55 +60,26 @@ export class DashboardComponent implements OnInit, AfterViewInit, OnDestroy {
   }
 
   loadStats(): void {
-    this.apiService.getCars().subscribe({
-      next: (cars) => {
-        this.stats.totalCars = cars.length;
-        this.stats.soldCars = cars.filter((car: any) => car.is_sold).length;
-        this.createChart();
-      },
-      error: (error) => {
-        console.error('Error loading cars:', error);
-      }
-    });
-
-    this.apiService.getMotorcycles().subscribe({
-      next: (motorcycles) => {
-        this.stats.totalMotorcycles = motorcycles.length;
-        this.stats.soldMotorcycles = motorcycles.filter((moto: any) => moto.is_sold).length;
-        this.createChart();
-      },
-      error: (error) => {
-        console.error('Error loading motorcycles:', error);
-      }
-    });
-
-    this.apiService.getSubscribers().subscribe({
-      next: (subscribers) => {
-        this.stats.totalSubscribers = subscribers.length;
+    // Totales y recientes en una sola petición; el backend los calcula con agregados
+    this.apiService.getStats(5).subscribe({
+      next: (stats) => {
+        this.stats.totalCars = stats.total_cars;
+        this.stats.soldCars = stats.sold_cars;
+        this.stats.totalMotorcycles = stats.total_motorcycles;
+        this.stats.soldMotorcycles = stats.sold_motorcycles;
+        this.stats.totalSubscribers = stats.total_subscribers;
+        this.recentCars = stats.recent_cars;
+        this.recentMotorcycles = stats.recent_motorcycles;
         this.isLoading = false;
+        this.createChart();
       },
       error: (error) => {
-        console.error('Error loading subscribers:', error);
-        this.stats.totalSubscribers = 0;
+        console.error('Error loading stats:', error);
         this.isLoading = false;
       }
     });
   }
 
-  loadRecentVehicles(): void {
-    this.apiService.getCars().subscribe({
-      next: (cars) => {
-        this.recentCars = cars.slice(0, 5);
-      }
-    });
-
-    this.apiService.getMotorcycles().subscribe({
-      next: (motorcycles) => {
-        this.recentMotorcycles = motorcycles.slice(0, 5);
-      }
-    });
-  }
-
   createChart(): void {
     if (this.stats.totalCars > 0 || this.stats.totalMotorcycles > 0) {
       const ctx = document.getElementById('vehicleChart') as HTMLCanvasElement;
@@ -157,6 +157,11 @@ export class ApiService {
     return this.http.delete(`${this.apiUrl}/contact-messages/${id}/`, { headers: this.getHeaders() });
   }
 
+  // Dashboard
+  getStats(recent: number = 5): Observable<any> {
+    return this.http.get(`${this.apiUrl}/stats/?recent=${recent}`, { headers: this.getHeaders() });
+  }
+
   // Subscribers
   getSubscribers(): Observable<any> {
     return this.http.get(`${this.apiUrl}/subscribers/`, { headers: this.getHeaders() });
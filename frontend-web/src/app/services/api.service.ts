@@ -137,7 +137,7 @@ export class ApiService {
   }
 
   getDiscounts(): Observable<any> {
-    return this.http.get(API_URL + '/discounts/');
+    return this.http.get(API_URL + '/discounts/active/');
   }
 
   getFeaturedItems(): Observable<any> {